@@ -0,0 +1,137 @@
+# animation.py
+import pygame
+from assets import SPRITE_SHEETS, load_sheet_frames
+
+
+class FrameCache:
+    """
+    Every frame of every animation clip, plus its pre-transformed variants.
+
+    Flipped (and optionally scaled or rotated) copies are built once when a
+    clip is added, so drawing never has to allocate a transformed surface.
+    A collision mask is precomputed for every variant at the same time.
+    """
+
+    def __init__(self):
+        self.clips = {}
+
+    def add_clip(self, name, frames, frame_duration, scale=None, rotations=()):
+        """
+        Adds a clip and builds its variants.
+
+        Parameters:
+            name (str): Clip name.
+            frames (list of pygame.Surface): Frames in playback order.
+            frame_duration (int): Milliseconds per frame at speed 1.
+            scale (tuple or None): (width, height) to scale every frame to.
+            rotations (iterable of int): Extra angles (degrees) to pre-rotate frames by.
+        """
+        if scale is not None:
+            frames = [pygame.transform.smoothscale(frame, scale) for frame in frames]
+        variants = {(False, 0): list(frames), (True, 0): [pygame.transform.flip(f, True, False) for f in frames]}
+        for angle in rotations:
+            for flipped in (False, True):
+                variants[(flipped, angle)] = [pygame.transform.rotate(f, angle) for f in variants[(flipped, 0)]]
+        masks = {key: [pygame.mask.from_surface(f) for f in variant_frames]
+                 for key, variant_frames in variants.items()}
+        self.clips[name] = {'variants': variants, 'masks': masks,
+                            'frame_duration': frame_duration, 'num_frames': len(frames)}
+
+    def frame(self, name, index, flipped=False, angle=0):
+        """Returns the cached surface for frame 'index' of clip 'name'."""
+        return self.clips[name]['variants'][(flipped, angle)][index]
+
+    def mask(self, name, index, flipped=False, angle=0):
+        """Returns the precomputed collision mask for frame 'index' of clip 'name'."""
+        return self.clips[name]['masks'][(flipped, angle)][index]
+
+
+def load_frame_cache(scales=None):
+    """
+    Builds a FrameCache holding every sheet in assets.SPRITE_SHEETS.
+
+    Parameters:
+        scales (dict or None): Optional clip name -> (width, height) to scale that clip to.
+    """
+    scales = scales or {}
+    cache = FrameCache()
+    for name, sheet in SPRITE_SHEETS.items():
+        cache.add_clip(name, load_sheet_frames(name), sheet["frame_duration"], scale=scales.get(name))
+    return cache
+
+
+class Animator:
+    """
+    Plays clips from a FrameCache for any number of entities.
+
+    Each entity has its own clip, playback speed and phase. Nothing is updated
+    per frame: the current frame is derived from the time when it is asked for,
+    so idle entities cost nothing.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        # Parallel per-entity lists; removed ids are recycled through free_ids.
+        self.clip = []
+        self.speed = []
+        self.phase = []  # Clip time in ms at 'start'
+        self.start = []
+        self.free_ids = []
+
+    def clear(self):
+        """Removes all entities."""
+        self.clip.clear()
+        self.speed.clear()
+        self.phase.clear()
+        self.start.clear()
+        self.free_ids.clear()
+
+    def add(self, clip, now, speed=1.0, phase=0):
+        """
+        Starts playing 'clip' for a new entity.
+
+        Returns:
+            int: The entity id.
+        """
+        if self.free_ids:
+            entity = self.free_ids.pop()
+            self.clip[entity] = clip
+            self.speed[entity] = speed
+            self.phase[entity] = phase
+            self.start[entity] = now
+        else:
+            entity = len(self.clip)
+            self.clip.append(clip)
+            self.speed.append(speed)
+            self.phase.append(phase)
+            self.start.append(now)
+        return entity
+
+    def remove(self, entity):
+        self.clip[entity] = None
+        self.free_ids.append(entity)
+
+    def clip_time(self, entity, now):
+        """Returns how far (in ms at speed 1) the entity is into its clip."""
+        return self.phase[entity] + (now - self.start[entity]) * self.speed[entity]
+
+    def set_clip_time(self, entity, clip_time, now):
+        self.phase[entity] = clip_time
+        self.start[entity] = now
+
+    def set_speed(self, entity, speed, now):
+        """Changes playback speed without jumping to a different frame."""
+        self.set_clip_time(entity, self.clip_time(entity, now), now)
+        self.speed[entity] = speed
+
+    def frame_index(self, entity, now):
+        clip = self.cache.clips[self.clip[entity]]
+        return int(self.clip_time(entity, now) // clip['frame_duration']) % clip['num_frames']
+
+    def frame(self, entity, now, flipped=False, angle=0):
+        """Returns the pre-transformed surface the entity shows at time 'now'."""
+        return self.cache.frame(self.clip[entity], self.frame_index(entity, now), flipped, angle)
+
+    def mask(self, entity, now, flipped=False, angle=0):
+        """Returns the collision mask matching frame(entity, now, flipped, angle)."""
+        return self.cache.mask(self.clip[entity], self.frame_index(entity, now), flipped, angle)
@@ -4,23 +4,140 @@ from settings import RED_WIDTH, RED_HEIGHT
 
 
 import os
+import json
+import mmap
+import struct
 import pygame
 
-def load_sprite_frames(sprite_sheet_path, rows=11, cols=10):
+# Sprite sheets packed into the asset bundle by build_assets.py.
+# last_row_frames is the number of used cells in the final row of the sheet.
+SPRITE_SHEETS = {
+    "red": {"path": "assets/images/sprite_sheet2.png", "rows": 11, "cols": 10,
+            "last_row_frames": 2, "frame_duration": 50},
+    "swim": {"path": "assets/images/sprite_sheet_swim_sm.png", "rows": 23, "cols": 10,
+             "last_row_frames": 5, "frame_duration": 50},
+}
+
+SPRITE_BUNDLE_PATH = "assets/sprites.bundle"
+BUNDLE_MAGIC = b"SPRB"
+BUNDLE_VERSION = 2
+BUNDLE_HEADER = struct.Struct("<4sII")  # magic, version, metadata length
+BUNDLE_ALIGNMENT = 64
+BUNDLE_PIXEL_FORMAT = "BGRA"  # Byte order of SDL's ARGB8888 display format on little-endian machines
+
+# Bundles stay mapped for the lifetime of the process; surfaces point into them.
+_loaded_bundles = {}
+
+
+def bundle_data_start(metadata_length):
+    """Returns the file offset of the (aligned) pixel data that follows the metadata."""
+    end = BUNDLE_HEADER.size + metadata_length
+    return (end + BUNDLE_ALIGNMENT - 1) // BUNDLE_ALIGNMENT * BUNDLE_ALIGNMENT
+
+
+def asset_path(relative_path):
+    """Resolves a path relative to the game directory."""
     base_path = os.path.dirname(os.path.abspath(__file__))
-    full_path = os.path.join(base_path, sprite_sheet_path)
-    sprite_sheet = pygame.image.load(full_path).convert_alpha()
-    sheet_width, sheet_height = sprite_sheet.get_width(), sprite_sheet.get_height()
+    return os.path.join(base_path, relative_path)
+
+
+def sheet_source_info(name):
+    """
+    Describes what the bundled copy of sheet 'name' was built from: the source
+    PNG's size and modification time plus the grid and timing parameters.
+
+    Returns:
+        dict: JSON-serialisable description, or None if the source PNG is missing.
+    """
+    sheet = SPRITE_SHEETS[name]
+    try:
+        stat = os.stat(asset_path(sheet["path"]))
+    except FileNotFoundError:
+        return None
+    return {"path": sheet["path"], "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "rows": sheet["rows"], "cols": sheet["cols"], "last_row_frames": sheet["last_row_frames"],
+            "frame_duration": sheet["frame_duration"]}
+
+
+def sheet_frame_rects(sheet_width, sheet_height, rows, cols, last_row_frames):
+    """
+    Computes the frame rectangles of a grid sprite sheet, row by row.
+
+    Returns:
+        list of tuple: (x, y, width, height) for every frame.
+    """
     frame_width = sheet_width // cols
     frame_height = sheet_height // rows
-    frames = []
+    rects = []
     for r in range(rows):
-        col_limit = cols if r < rows - 1 else 2
+        col_limit = cols if r < rows - 1 else last_row_frames
         for c in range(col_limit):
-            rect = pygame.Rect(c * frame_width, r * frame_height, frame_width, frame_height)
-            frame = sprite_sheet.subsurface(rect)
-            frames.append(frame)
-    return frames
+            rects.append((c * frame_width, r * frame_height, frame_width, frame_height))
+    return rects
+
+
+def load_sprite_frames(sprite_sheet_path, rows=11, cols=10, last_row_frames=2):
+    full_path = asset_path(sprite_sheet_path)
+    sprite_sheet = pygame.image.load(full_path).convert_alpha()
+    rects = sheet_frame_rects(sprite_sheet.get_width(), sprite_sheet.get_height(), rows, cols, last_row_frames)
+    return [sprite_sheet.subsurface(pygame.Rect(rect)) for rect in rects]
+
+
+def load_sprite_bundle(bundle_path=SPRITE_BUNDLE_PATH):
+    """
+    Memory-maps a bundle written by build_assets.py and builds surfaces directly
+    on the mapped pixel data, without decoding any PNGs.
+
+    Parameters:
+        bundle_path (str): Path to the bundle, relative to the game directory.
+
+    Returns:
+        dict: Sheet name -> {'frames': list of pygame.Surface, 'frame_duration': int,
+              'source': dict from sheet_source_info() at build time}.
+    """
+    if bundle_path in _loaded_bundles:
+        return _loaded_bundles[bundle_path]
+    with open(asset_path(bundle_path), "rb") as bundle_file:
+        # ACCESS_COPY gives the writable buffer pygame wants while still sharing clean pages.
+        mapped = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, version, metadata_length = BUNDLE_HEADER.unpack_from(mapped, 0)
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+        raise ValueError(f"{bundle_path} is not a version {BUNDLE_VERSION} sprite bundle")
+    metadata = json.loads(mapped[BUNDLE_HEADER.size:BUNDLE_HEADER.size + metadata_length])
+
+    view = memoryview(mapped)
+    data_start = bundle_data_start(metadata_length)
+    sheets = {}
+    for name, sheet in metadata["sheets"].items():
+        size = (sheet["width"], sheet["height"])
+        start = data_start + sheet["offset"]
+        pixels = view[start:start + sheet["width"] * sheet["height"] * 4]
+        surface = pygame.image.frombuffer(pixels, size, metadata["format"])
+        frames = [surface.subsurface(pygame.Rect(rect)) for rect in sheet["frames"]]
+        sheets[name] = {'frames': frames, 'frame_duration': sheet["frame_duration"], 'source': sheet["source"]}
+    _loaded_bundles[bundle_path] = sheets
+    return sheets
+
+
+def load_sheet_frames(name):
+    """
+    Returns the frames of a sprite sheet from SPRITE_SHEETS, using the asset bundle
+    when it has been built from the current source and falling back to decoding
+    the PNG otherwise. Without the PNG there is nothing to check, so the bundle is trusted.
+    """
+    if os.path.exists(asset_path(SPRITE_BUNDLE_PATH)):
+        try:
+            bundled = load_sprite_bundle().get(name)
+        except ValueError as error:
+            print(f"Ignoring sprite bundle: {error}")
+            bundled = None
+        if bundled is not None:
+            source = sheet_source_info(name)
+            if source is None or source == bundled['source']:
+                return bundled['frames']
+        print(f"Sprite bundle is out of date for '{name}'; loading the PNG (run build_assets.py)")
+    sheet = SPRITE_SHEETS[name]
+    return load_sprite_frames(sheet["path"], sheet["rows"], sheet["cols"], sheet["last_row_frames"])
 
 
 def load_image(image_path):
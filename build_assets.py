@@ -0,0 +1,58 @@
+# build_assets.py
+# Packs every sheet in assets.SPRITE_SHEETS into a single bundle of raw pixels in
+# display byte order, plus frame rectangles and animation metadata, so the game can
+# memory-map it at startup instead of decoding PNGs. Run with: python build_assets.py
+import json
+import pygame
+from assets import (SPRITE_SHEETS, SPRITE_BUNDLE_PATH, BUNDLE_MAGIC, BUNDLE_VERSION, BUNDLE_HEADER,
+                    BUNDLE_ALIGNMENT, BUNDLE_PIXEL_FORMAT, asset_path, bundle_data_start, sheet_frame_rects,
+                    sheet_source_info)
+
+
+def build_bundle(output_path=SPRITE_BUNDLE_PATH):
+    """
+    Writes the sprite bundle.
+
+    Parameters:
+        output_path (str): Bundle path, relative to the game directory.
+
+    Returns:
+        int: Size of the written bundle in bytes.
+    """
+    sheets = {}
+    blobs = []
+    data_size = 0
+    for name, sheet in SPRITE_SHEETS.items():
+        image = pygame.image.load(asset_path(sheet["path"]))
+        width, height = image.get_size()
+        pixels = pygame.image.tobytes(image, BUNDLE_PIXEL_FORMAT)
+        sheets[name] = {
+            "offset": data_size,
+            "width": width,
+            "height": height,
+            "frames": sheet_frame_rects(width, height, sheet["rows"], sheet["cols"], sheet["last_row_frames"]),
+            "frame_duration": sheet["frame_duration"],
+            "source": sheet_source_info(name),  # Lets the game detect a stale bundle
+        }
+        padding = -len(pixels) % BUNDLE_ALIGNMENT
+        blobs.append(pixels + bytes(padding))
+        data_size += len(pixels) + padding
+
+    metadata = json.dumps({"format": BUNDLE_PIXEL_FORMAT, "sheets": sheets}).encode("utf-8")
+    data_start = bundle_data_start(len(metadata))
+    with open(asset_path(output_path), "wb") as bundle_file:
+        bundle_file.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(metadata)))
+        bundle_file.write(metadata)
+        bundle_file.write(bytes(data_start - BUNDLE_HEADER.size - len(metadata)))
+        for blob in blobs:
+            bundle_file.write(blob)
+    return data_start + data_size
+
+
+def main():
+    size = build_bundle()
+    print(f"Wrote {SPRITE_BUNDLE_PATH} ({size} bytes, {len(SPRITE_SHEETS)} sheets)")
+
+
+if __name__ == "__main__":
+    main()
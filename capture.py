@@ -0,0 +1,209 @@
+# capture.py
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+import pygame
+from settings import FPS, CAPTURE_DIR, CAPTURE_POOL_SIZE, CAPTURE_PNG_COMPRESSION
+
+
+def encode_png(rgb, width, height, compression=CAPTURE_PNG_COMPRESSION):
+    """
+    Encodes packed 8-bit RGB pixels as a PNG. Uses only zlib, which releases
+    the GIL while compressing, so it runs well on a background thread.
+
+    Returns:
+        bytes: The PNG file contents.
+    """
+    stride = width * 3
+    raw = bytearray((stride + 1) * height)  # Each row starts with filter type 0 (None)
+    for y in range(height):
+        start = y * (stride + 1) + 1
+        raw[start:start + stride] = rgb[y * stride:(y + 1) * stride]
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, compression)) + chunk(b"IEND", b""))
+
+
+def _channel_offsets(surface):
+    """Returns the byte offsets of R, G and B within one pixel of 'surface'."""
+    bytesize = surface.get_bytesize()
+    if bytesize not in (3, 4):
+        raise ValueError("Only 24- and 32-bit surfaces can be captured")
+    offsets = []
+    for shift in surface.get_shifts()[:3]:
+        byte = shift // 8
+        offsets.append(byte if sys.byteorder == "little" else bytesize - 1 - byte)
+    return offsets
+
+
+class FrameRecorder:
+    """
+    Records gameplay without stalling the render loop.
+
+    capture() only copies the frame (or a dirty region of it) into a pooled
+    buffer and queues it. A background worker assembles full frames and writes
+    them either as a PNG image sequence or as a raw RGB24 video stream. When
+    every pooled buffer is in flight the frame is dropped and counted, unless
+    the caller asks to block, as a headless run that needs every frame would.
+    """
+
+    def __init__(self, output_dir=CAPTURE_DIR, mode="png", pool_size=CAPTURE_POOL_SIZE):
+        """
+        Parameters:
+            output_dir (str): Each recording goes into its own timestamped subdirectory of this.
+            mode (str): "png" for numbered PNG files, "raw" for a single rgb24 stream.
+            pool_size (int): Number of frame buffers that can be in flight at once.
+        """
+        if mode not in ("png", "raw"):
+            raise ValueError(f"Unknown capture mode: {mode}")
+        self.mode = mode
+        self.output_dir = self._session_dir(output_dir)
+
+        self.pool_size = pool_size
+        self.buffer_size = 0
+        self.free_buffers = queue.Queue()
+        self.pending = queue.Queue()
+        self.frame_size = None  # (width, height) of the last full capture
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_written = 0
+
+        self.raw_file = None
+        self.closed = False
+        self.worker = threading.Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self.worker.start()
+
+    @staticmethod
+    def _session_dir(parent):
+        # A fresh directory per recording, so a new one never overwrites the last.
+        base = os.path.join(parent, time.strftime("%Y%m%d-%H%M%S"))
+        path, suffix = base, 1
+        while True:
+            try:
+                os.makedirs(path)
+                return path
+            except FileExistsError:
+                suffix += 1
+                path = f"{base}-{suffix}"
+
+    def _allocate_pool(self, size):
+        # Buffers are sized for a full frame, so any dirty region fits as well.
+        self.buffer_size = size
+        for _ in range(self.pool_size):
+            self.free_buffers.put(bytearray(size))
+
+    def capture(self, surface, rect=None, block=False):
+        """
+        Queues the contents of 'surface' for encoding.
+
+        Parameters:
+            surface (pygame.Surface): Usually the display surface, after drawing.
+            rect (pygame.Rect or None): Only this region changed since the previous capture.
+            block (bool): Wait for a free buffer instead of dropping the frame.
+
+        Returns:
+            bool: False if the frame was dropped.
+        """
+        width, height = surface.get_size()
+        bytesize = surface.get_bytesize()
+        if self.buffer_size == 0:
+            self._allocate_pool(width * height * bytesize)
+        if (width, height) != self.frame_size or rect is None:
+            rect = pygame.Rect(0, 0, width, height)  # Worker needs a full frame to patch regions into
+        else:
+            rect = rect.clip(surface.get_rect())
+        try:
+            buffer = self.free_buffers.get(block=block)
+        except queue.Empty:
+            self.frames_dropped += 1
+            self.frame_size = None  # The worker missed this frame's changes; resync with a full frame
+            return False
+        self.frame_size = (width, height)
+
+        pitch = surface.get_pitch()
+        row_bytes = rect.width * bytesize
+        proxy = surface.get_buffer()
+        try:
+            pixels = memoryview(proxy).cast("B")
+            if rect.width == width and pitch == row_bytes:
+                start = rect.top * pitch
+                buffer[:row_bytes * rect.height] = pixels[start:start + row_bytes * rect.height]
+            else:
+                for row in range(rect.height):
+                    start = (rect.top + row) * pitch + rect.left * bytesize
+                    buffer[row * row_bytes:(row + 1) * row_bytes] = pixels[start:start + row_bytes]
+            pixels.release()
+        finally:
+            del proxy  # Unlocks the surface
+
+        self.frames_captured += 1
+        self.pending.put((buffer, (width, height), tuple(rect), bytesize, _channel_offsets(surface)))
+        return True
+
+    def _run(self):
+        canvas = None
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            buffer, (width, height), (left, top, w, h), bytesize, (r, g, b) = item
+            if canvas is None or len(canvas) != width * height * 3:
+                canvas = bytearray(width * height * 3)
+
+            # Convert the region to RGB and patch it into the full frame.
+            region = buffer[:w * h * bytesize]
+            rgb = bytearray(w * h * 3)
+            rgb[0::3] = region[r::bytesize]
+            rgb[1::3] = region[g::bytesize]
+            rgb[2::3] = region[b::bytesize]
+            self.free_buffers.put(buffer)  # Hand the buffer back before the slow part
+            if w == width:
+                canvas[top * width * 3:(top + h) * width * 3] = rgb
+            else:
+                for row in range(h):
+                    start = ((top + row) * width + left) * 3
+                    canvas[start:start + w * 3] = rgb[row * w * 3:(row + 1) * w * 3]
+
+            if self.mode == "png":
+                path = os.path.join(self.output_dir, f"frame_{self.frames_written:06d}.png")
+                with open(path, "wb") as image_file:
+                    image_file.write(encode_png(canvas, width, height))
+            else:
+                if self.raw_file is None:
+                    self.raw_file = open(os.path.join(self.output_dir, "capture.rgb"), "wb")
+                    # Enough to replay with: ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i capture.rgb
+                    with open(os.path.join(self.output_dir, "capture.json"), "w") as info_file:
+                        json.dump({"width": width, "height": height, "fps": FPS, "pix_fmt": "rgb24"}, info_file)
+                self.raw_file.write(canvas)
+            self.frames_written += 1
+
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+        print(f"Capture finished: {self.frames_written} frames written to {self.output_dir}, "
+              f"{self.frames_dropped} dropped")
+
+    def close(self, wait=True):
+        """
+        Stops recording. Frames already queued are still written. Safe to call
+        again, e.g. with wait=True at exit after an earlier close(wait=False).
+
+        Parameters:
+            wait (bool): Block until they are. Pass False from the render loop; the
+                worker then finishes in the background.
+        """
+        if not self.closed:
+            self.closed = True
+            self.pending.put(None)
+        if wait:
+            self.worker.join()
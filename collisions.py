@@ -58,4 +58,35 @@ def resolve_red_collision(rect, obstacles):
                 collision_found = True
                 break  # Check again after adjustment
         iterations += 1
-    return rect
\ No newline at end of file
+    return rect
+
+
+def make_circle_mask(diameter):
+    """
+    Builds a collision mask for a filled circle of the given diameter.
+
+    Parameters:
+        diameter (int): Circle diameter in pixels.
+
+    Returns:
+        pygame.mask.Mask: Mask whose set bits cover the circle.
+    """
+    surface = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+    pygame.draw.circle(surface, (255, 255, 255), (diameter // 2, diameter // 2), diameter // 2)
+    return pygame.mask.from_surface(surface)
+
+
+def mask_collision(mask_a, pos_a, mask_b, pos_b):
+    """
+    Pixel-accurate overlap test between two masks placed at top-left positions.
+    Intended as a narrowphase after a cheap rect test has already hit.
+
+    Parameters:
+        mask_a, mask_b (pygame.mask.Mask): The masks to test.
+        pos_a, pos_b (tuple): (x, y) top-left position of each mask.
+
+    Returns:
+        bool: True if any set pixels overlap.
+    """
+    offset = (int(pos_b[0]) - int(pos_a[0]), int(pos_b[1]) - int(pos_a[1]))
+    return mask_a.overlap(mask_b, offset) is not None
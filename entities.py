@@ -0,0 +1,28 @@
+# entities.py
+import pygame
+from settings import PINK_DIAMETER
+
+
+class PinkCircle:
+    """
+    A pink hazard. Uses __slots__ so the many live hazards stay compact and
+    per-tick attribute access avoids a dict lookup.
+    """
+
+    __slots__ = ('x', 'y', 'rect', 'speed_x', 'speed_y', 'homing', 'anim')
+
+    def __init__(self, x, y, speed_x, speed_y, homing, anim):
+        """
+        Parameters:
+            x (float), y (float): Top-left position.
+            speed_x (float), speed_y (float): Velocity in pixels per tick.
+            homing (bool): Whether the hazard steers towards the red block.
+            anim (int): Animator entity id for its swimming animation.
+        """
+        self.x = x  # Sub-pixel position; rect holds it truncated for collisions and drawing
+        self.y = y
+        self.rect = pygame.Rect(x, y, PINK_DIAMETER, PINK_DIAMETER)
+        self.speed_x = speed_x
+        self.speed_y = speed_y
+        self.homing = homing
+        self.anim = anim
@@ -0,0 +1,156 @@
+# flow_field.py
+from collections import deque
+import math
+import pygame
+from settings import WIDTH, HEIGHT, LEVEL_CELL_SIZE
+
+
+class FlowField:
+    """
+    A vector field over the level grid that points every open cell one step
+    closer to a target cell.
+
+    The field is built with a single breadth-first search from the target, so
+    any number of hazards can steer towards it with an O(1) lookup. It is only
+    rebuilt when the target enters a different cell or when the barrier layer
+    is switched on or off; all other frames reuse the previous result. A
+    rebuild is a full search, which is cheap at this grid size.
+
+    Cells closer than 'clearance' to an obstacle count as blocked, so a hazard
+    of that half-size moving between open cell centres never clips a corner.
+    """
+
+    def __init__(self, obstacles, barriers, cell_size=LEVEL_CELL_SIZE, clearance=0, deferred=False):
+        """
+        Parameters:
+            obstacles (list of pygame.Rect): Static level obstacles.
+            barriers (list of pygame.Rect): Toggleable barriers (e.g. from get_cell_barriers).
+            cell_size (int): Size of a grid cell in pixels.
+            clearance (int): Half the size of the objects steering on the field.
+            deferred (bool): Leave the layers unbuilt until iter_build() has run to completion.
+        """
+        self.cell_size = cell_size
+        self.cols = WIDTH // cell_size
+        self.rows = HEIGHT // cell_size
+        num_cells = self.cols * self.rows
+
+        # Obstacle and barrier layers are rasterised once per level, grown by the
+        # steering object's footprint.
+        self.obstacles = [rect.inflate(2 * clearance, 2 * clearance) for rect in obstacles]
+        self.barriers = [rect.inflate(2 * clearance, 2 * clearance) for rect in barriers]
+        self.static_blocked = [False] * num_cells
+        self.barrier_blocked = [False] * num_cells
+        self.barriers_enabled = True
+        self.blocked = [False] * num_cells
+
+        # next_cell[i] is the neighbour to move to from cell i, or -1 if the
+        # target is unreachable (or i is the target cell itself).
+        self.next_cell = [-1] * num_cells
+        self.distance = [-1] * num_cells
+        self.target_cell = None
+        self.dirty = True
+
+        if not deferred:
+            for _ in self.iter_build():
+                pass
+
+    def iter_build(self, rows_per_step=1):
+        """
+        Rasterises the obstacle and barrier layers, yielding after each band of
+        grid rows so the work can be spread over frames.
+        """
+        cell_size = self.cell_size
+        cell_rect = pygame.Rect(0, 0, cell_size, cell_size)
+        for r in range(self.rows):
+            for c in range(self.cols):
+                index = r * self.cols + c
+                cell_rect.topleft = (c * cell_size, r * cell_size)
+                self.static_blocked[index] = cell_rect.collidelist(self.obstacles) != -1
+                self.barrier_blocked[index] = cell_rect.collidelist(self.barriers) != -1
+            if (r + 1) % rows_per_step == 0:
+                yield
+        self.blocked = [s or (b and self.barriers_enabled)
+                        for s, b in zip(self.static_blocked, self.barrier_blocked)]
+        self.dirty = True
+
+    def cell_index(self, point):
+        """Returns the flat index of the cell containing 'point', clamped to the grid."""
+        c = min(max(int(point[0]) // self.cell_size, 0), self.cols - 1)
+        r = min(max(int(point[1]) // self.cell_size, 0), self.rows - 1)
+        return r * self.cols + c
+
+    def set_barriers_enabled(self, enabled):
+        """Switches the barrier layer on or off, marking the field for a rebuild if it changed."""
+        if enabled == self.barriers_enabled:
+            return
+        self.barriers_enabled = enabled
+        for index, is_barrier in enumerate(self.barrier_blocked):
+            if is_barrier:
+                self.blocked[index] = self.static_blocked[index] or enabled
+        self.dirty = True
+
+    def set_target(self, point):
+        """
+        Moves the target to 'point'. The field is rebuilt only if the target
+        crossed into another cell or the blocked layout changed since the last build.
+        """
+        target_cell = self.cell_index(point)
+        if target_cell == self.target_cell and not self.dirty:
+            return
+        self.target_cell = target_cell
+        self._rebuild()
+
+    def _rebuild(self):
+        cols, rows = self.cols, self.rows
+        blocked = self.blocked
+        distance = self.distance
+        next_cell = self.next_cell
+        for index in range(len(distance)):
+            distance[index] = -1
+            next_cell[index] = -1
+
+        target = self.target_cell
+        distance[target] = 0
+        queue = deque([target])
+        while queue:
+            index = queue.popleft()
+            c, r = index % cols, index // cols
+            step = distance[index] + 1
+            for nc, nr in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1)):
+                if 0 <= nc < cols and 0 <= nr < rows:
+                    neighbour = nr * cols + nc
+                    if distance[neighbour] == -1 and not blocked[neighbour]:
+                        distance[neighbour] = step
+                        next_cell[neighbour] = index
+                        queue.append(neighbour)
+
+        # A hazard's centre can sit in a cell that is only partly covered by an
+        # obstacle; point such cells at their closest reachable neighbour.
+        for index, is_blocked in enumerate(blocked):
+            if not is_blocked or index == target:
+                continue
+            c, r = index % cols, index // cols
+            best = -1
+            for nc, nr in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1)):
+                if 0 <= nc < cols and 0 <= nr < rows:
+                    neighbour = nr * cols + nc
+                    if distance[neighbour] != -1 and (best == -1 or distance[neighbour] < distance[best]):
+                        best = neighbour
+            next_cell[index] = best
+        self.dirty = False
+
+    def direction(self, point):
+        """
+        Returns a unit vector (dx, dy) steering from 'point' towards the centre of
+        the next cell on the shortest path to the target, or (0, 0) if there is none.
+        """
+        next_index = self.next_cell[self.cell_index(point)]
+        if next_index == -1:
+            return 0.0, 0.0
+        half = self.cell_size // 2
+        dx = (next_index % self.cols) * self.cell_size + half - point[0]
+        dy = (next_index // self.cols) * self.cell_size + half - point[1]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return 0.0, 0.0
+        return dx / length, dy / length
@@ -1,18 +1,32 @@
 # game_state.py
-import pygame, sys, random, math
-from settings import WIDTH, HEIGHT, GAME_STATE_INSTRUCTIONS, GAME_STATE_PLAYING, GAME_STATE_WIN, GAME_STATE_LOSE, SWITCH_TIMER_DURATION, PINK_DIAMETER, PINK_SPEED, BLUE_SIZE, RED_WIDTH, RED_HEIGHT
-from level import generate_candidate_level, get_cell_barriers, bfs_path_length
-from collisions import resolve_red_collision, circle_rect_collision
+import pygame, sys, random, math, time
+from settings import WIDTH, HEIGHT, GAME_STATE_INSTRUCTIONS, GAME_STATE_PLAYING, GAME_STATE_WIN, GAME_STATE_LOSE, SWITCH_TIMER_DURATION, PINK_DIAMETER, PINK_SPEED, PINK_HOMING_CHANCE, PINK_SPAWN_CLEARANCE, BLUE_SIZE, RED_WIDTH, RED_HEIGHT, SWITCH_PLACEMENT_ATTEMPTS, LEVEL_GENERATION_BUDGET_MS, LEVEL_SEARCH_BUDGET_MS, LEVEL_REFINE_BUDGET_MS, LEVEL_MAX_CANDIDATES, LEVEL_STEP_MAX_MS, PINK_SPAWN_INTERVAL
+from level import LevelGenerator, get_cell_barriers, iter_bfs_path_length
+from collisions import resolve_red_collision, make_circle_mask, mask_collision
 from input_handler import get_blue_movement
+from flow_field import FlowField
+from rewind import StateHistory
+from spawn import FreeSpaceSampler
+from animation import Animator
+from scheduler import Scheduler
+from entities import PinkCircle
 
 class Game:
-    def __init__(self, screen, sprite_frames):
+    def __init__(self, screen, frame_cache, clock=pygame.time.get_ticks):
         self.screen = screen
-        self.sprite_frames = sprite_frames
-        self.num_frames = len(sprite_frames)
-        self.current_frame_index = 0
-        self.frame_duration = 50  # milliseconds per frame
-        self.last_frame_update_time = pygame.time.get_ticks()
+        # All game timers run off this scheduler; pass a scheduler.ManualClock for headless runs
+        self.scheduler = Scheduler(clock)
+        self.frame_cache = frame_cache
+        self.animator = Animator(frame_cache)
+        self.pink_mask = make_circle_mask(PINK_DIAMETER)
+        # Reused for every tentative move so a tick does not allocate rects
+        self.scratch_rect = pygame.Rect(0, 0, 0, 0)
+
+        # Co-op: a second player drives the ally block once their input arrives over the
+        # network. On the joining side the host owns the simulation, including restarts.
+        self.ally_active = False
+        self.ally_input = (0, 0)
+        self.follows_host = False
 
         # Initialize joystick if available
         pygame.joystick.init()
@@ -27,8 +41,14 @@ class Game:
         self.font = pygame.font.Font(None, 80)
         self.instruction_font = pygame.font.Font(None, 30)
 
-        # Initialize game state
+        # Ring buffer of recent ticks for rollback and rewind
+        self.history = StateHistory()
+
+        # Initialize game state. No frame has been drawn yet, so the first level
+        # is finished here rather than spread over frames.
         self.reset()
+        while not self.level_ready:
+            self.build_level(LEVEL_GENERATION_BUDGET_MS)
 
     def reset(self, start_state=GAME_STATE_INSTRUCTIONS):
         """Resets the game to the initial state.
@@ -44,70 +64,241 @@ class Game:
         self.red_speed_y = 1.7
         self.red_rect = pygame.Rect(self.red_x, self.red_y, RED_WIDTH, RED_HEIGHT)
 
-        # Generate level obstacles and the green block using level functions
-        self.obstacles, self.green_rect = generate_candidate_level(self.red_rect, candidate_attempts=10)
-
-        # Generate the switch for deactivating barriers
-        self.switch_rect = self.generate_switch()
+        # Animated entities belong to the previous round
+        self.animator.clear()
+        self.red_anim = self.animator.add("red", self.scheduler.now())
 
-        # Initialize blue block at a valid position
-        self.blue_x, self.blue_y, self.blue_rect = self.generate_blue_block()
+        # Start building a new level. Each frame gets a fixed time budget for it,
+        # so a reset never stalls rendering; play waits until the level is installed.
+        # The search is kept so it can keep improving the level on the instructions screen.
+        self.level_generator = LevelGenerator(self.red_rect, max_candidates=LEVEL_MAX_CANDIDATES)
+        self.level_search_ms = 0.0
+        self.level_setup = None
+        self.level_setup_failures = 0
+        self.level_ready = False
+        self.build_level(LEVEL_GENERATION_BUDGET_MS)
 
         # Flags for game progression
         self.barriers_disabled = False
         self.switch_triggered = False
         self.switch_activation_time = None
 
-        # Initialize pink hazard circles and spawn timer
+        # Initialize pink hazard circles; timed events start when the switch is hit
         self.pink_circles = []
-        self.next_pink_spawn_time = None
+        self.scheduler.clear()
+        self.switch_timer_event = None
+        self.pink_spawn_event = None
 
-    def generate_blue_block(self):
-        """Generates a valid blue block position that does not overlap obstacles or barriers."""
-        from level import get_cell_barriers
-        while True:
-            blue_x = random.randint(0, WIDTH - BLUE_SIZE)
-            blue_y = random.randint(0, HEIGHT - BLUE_SIZE)
-            blue_rect = pygame.Rect(blue_x, blue_y, BLUE_SIZE, BLUE_SIZE)
-            conflict = False
-            # Check collision with obstacles
-            for obs in self.obstacles:
-                if blue_rect.colliderect(obs):
-                    conflict = True
-                    break
-            # Check collision with barriers around the green block
-            for barrier in get_cell_barriers(self.green_rect, pad=10, thick=10):
-                if blue_rect.colliderect(barrier):
-                    conflict = True
-                    break
-            if not conflict:
-                return blue_x, blue_y, blue_rect
-
-    def generate_switch(self):
-        """Finds a valid location for the orange switch."""
+        # Saved ticks belong to the previous level
+        self.history.clear()
+
+    def iter_level_setup(self, obstacles, green_rect, path_length):
+        """
+        Prepares a generated level in small steps: places the switch and blue block
+        and builds the per-level spawn maps and flow field. Yields None between steps,
+        then the finished level for install_level(). Nothing on the Game changes.
+        Raises RuntimeError if the switch or blue block cannot be placed.
+        """
+        cell_barriers = get_cell_barriers(green_rect, pad=10, thick=10)
+        closed_barriers = obstacles + cell_barriers
+        placement_sampler = FreeSpaceSampler(closed_barriers + [green_rect], deferred=True)
+        yield from placement_sampler.iter_build()
+        yield from placement_sampler.iter_positions(BLUE_SIZE, BLUE_SIZE, rows_per_step=2)
+
+        # Generate the switch for deactivating barriers
+        switch_rect = yield from self.iter_switch_placement(placement_sampler, closed_barriers)
+
+        # Initialize blue block and the co-op ally block at valid positions
+        blue_x, blue_y, blue_rect = self.generate_blue_block(placement_sampler)
+        ally_x, ally_y, ally_rect = self.generate_blue_block(placement_sampler)
+
+        # Free-space map for spawning pink hazards
+        pink_sampler = FreeSpaceSampler(obstacles, deferred=True)
+        yield from pink_sampler.iter_build()
+        yield from pink_sampler.iter_positions(PINK_DIAMETER, PINK_DIAMETER, rows_per_step=2)
+
+        # Flow field that steers homing hazards towards the red block
+        flow_field = FlowField(obstacles, cell_barriers, clearance=PINK_DIAMETER // 2, deferred=True)
+        yield from flow_field.iter_build()
+
+        yield {'obstacles': obstacles, 'green_rect': green_rect, 'path_length': path_length,
+               'switch_rect': switch_rect, 'blue_rect': blue_rect, 'blue_x': blue_x, 'blue_y': blue_y,
+               'ally_rect': ally_rect, 'ally_x': ally_x, 'ally_y': ally_y,
+               'pink_sampler': pink_sampler, 'flow_field': flow_field}
+
+    def install_level(self, level):
+        """Switches to a level prepared by iter_level_setup(). Cheap; all the work was done while preparing it."""
+        print("Selected candidate with path length:", level['path_length'])
+        self.obstacles = level['obstacles']
+        self.green_rect = level['green_rect']
+        self.level_path_length = level['path_length']
+        self.switch_rect = level['switch_rect']
+        self.blue_x, self.blue_y, self.blue_rect = level['blue_x'], level['blue_y'], level['blue_rect']
+        self.ally_x, self.ally_y, self.ally_rect = level['ally_x'], level['ally_y'], level['ally_rect']
+        self.pink_sampler = level['pink_sampler']
+        self.flow_field = level['flow_field']
+        self.build_barrier_lists()
+        self.level_ready = True
+
+    def build_level(self, budget_ms):
+        """
+        Advances level generation and setup for up to 'budget_ms' milliseconds, and
+        can be resumed on the next frame. The work is split into small steps (part of
+        a path check, a band of grid rows), and no step starts unless LEVEL_STEP_MAX_MS
+        of the budget is left, so the slice ends within budget.
+
+        After a reset, searching stops once LEVEL_SEARCH_BUDGET_MS has been spent
+        and a valid level exists; that level is then set up and installed. Once a
+        level is installed, further calls look for a shorter path and switch to it
+        when it is fully set up. Only used before play starts, or while play waits
+        for a reset's level.
+
+        Returns:
+            bool: True if a level was installed during this call.
+        """
+        deadline = time.perf_counter() + (budget_ms - LEVEL_STEP_MAX_MS) / 1000
         while True:
-            switch_x = random.randint(0, WIDTH - BLUE_SIZE)  # Using SWITCH_SIZE; assumed same as blue block here
-            switch_y = random.randint(0, HEIGHT - BLUE_SIZE)
-            switch_rect = pygame.Rect(switch_x, switch_y, BLUE_SIZE, BLUE_SIZE)
-            conflict = switch_rect.colliderect(self.green_rect)
-            for obs in self.obstacles:
-                if switch_rect.colliderect(obs):
-                    conflict = True
-                    break
-            if not conflict:
-                # Also ensure it doesn't conflict with cell barriers around green_rect
-                for barrier in get_cell_barriers(self.green_rect, pad=10, thick=10):
-                    if switch_rect.colliderect(barrier):
-                        conflict = True
-                        break
-            if not conflict:
-                # Verify a valid path exists from red to switch
-                barriers = self.obstacles + get_cell_barriers(self.green_rect, pad=10, thick=10)
-                if bfs_path_length(self.red_rect.center, switch_rect.center, barriers) is not None:
-                    return switch_rect
+            remaining_ms = (deadline - time.perf_counter()) * 1000
+            if remaining_ms <= 0:
+                return False
+
+            if self.level_setup is None:
+                generator = self.level_generator
+                if not self.level_ready:
+                    searching = generator.best is None or (not generator.done
+                                                           and self.level_search_ms < LEVEL_SEARCH_BUDGET_MS)
+                    if searching:
+                        if generator.done:
+                            raise RuntimeError("Couldn't generate any valid candidate levels.")
+                        slice_ms = remaining_ms
+                        if generator.best is not None:
+                            slice_ms = min(slice_ms, LEVEL_SEARCH_BUDGET_MS - self.level_search_ms)
+                        started = time.perf_counter()
+                        generator.step(slice_ms)
+                        self.level_search_ms += (time.perf_counter() - started) * 1000
+                        continue
+                else:
+                    # Only a shorter path than the installed level is worth setting up
+                    if generator.done:
+                        return False
+                    if not generator.step(remaining_ms) or generator.best[2] >= self.level_path_length:
+                        continue
+                self.level_setup = self.iter_level_setup(*generator.best)
+
+            try:
+                level = next(self.level_setup)
+            except RuntimeError as error:
+                self.level_setup = None
+                if self.level_ready:
+                    print("Keeping current level:", error)
+                    continue
+                # A level without room for the switch or blue block is thrown away
+                self.level_setup_failures += 1
+                if self.level_setup_failures >= 3:
+                    raise RuntimeError("Couldn't place the switch and blue block in any level.")
+                print("Regenerating level:", error)
+                self.level_generator = LevelGenerator(self.red_rect, max_candidates=LEVEL_MAX_CANDIDATES)
+                self.level_search_ms = 0.0
+                continue
+            if level is not None:
+                self.level_setup = None
+                self.install_level(level)
+                return True
+
+    def build_barrier_lists(self):
+        """
+        Builds the per-level barrier lists that movement is tested against. Call
+        again whenever obstacles or green_rect change; current_barriers() then
+        picks between them without copying.
+        """
+        self.cell_barriers = get_cell_barriers(self.green_rect, pad=10, thick=10)
+        self.closed_barriers = self.obstacles + self.cell_barriers
+
+    def current_barriers(self):
+        """Returns what blocks movement right now: the obstacles, plus the cell barriers unless disabled."""
+        return self.obstacles if self.barriers_disabled else self.closed_barriers
+
+    def schedule_switch_events(self, next_spawn_time):
+        """
+        (Re)schedules the events that run once the switch is active: the lose
+        timer and the periodic pink spawns, the next one at 'next_spawn_time'.
+        Does nothing but cancel them if the switch has not been activated.
+        """
+        self.scheduler.cancel(self.switch_timer_event)
+        self.scheduler.cancel(self.pink_spawn_event)
+        self.switch_timer_event = None
+        self.pink_spawn_event = None
+        if self.switch_activation_time is None:
+            return
+        self.switch_timer_event = self.scheduler.call_at(self.switch_activation_time + SWITCH_TIMER_DURATION,
+                                                         self.on_switch_timer_expired)
+        self.pink_spawn_event = self.scheduler.call_at(next_spawn_time, self.spawn_pink_circle,
+                                                       interval=PINK_SPAWN_INTERVAL)
+
+    def on_switch_timer_expired(self):
+        """Lose condition: the switch timer ran out before red reached green."""
+        self.game_state = GAME_STATE_LOSE
+
+    def save_snapshot(self):
+        """Records the current simulation state in the history ring buffer."""
+        self.history.save(self, self.scheduler.now())
+
+    def restore_snapshot(self, ticks_ago=0):
+        """
+        Restores the simulation state saved 'ticks_ago' ticks before the latest one.
+        Returns False if that tick is no longer in the history.
+        """
+        if not self.history.restore(self, ticks_ago, self.scheduler.now()):
+            return False
+        self.flow_field.set_barriers_enabled(not self.barriers_disabled)
+        return True
+
+    def generate_blue_block(self, placement_sampler):
+        """Generates a valid blue block position that does not overlap obstacles or barriers."""
+        position = placement_sampler.sample(BLUE_SIZE, BLUE_SIZE)
+        if position is None:
+            raise RuntimeError("No free space for the blue block.")
+        blue_x, blue_y = position
+        return blue_x, blue_y, pygame.Rect(blue_x, blue_y, BLUE_SIZE, BLUE_SIZE)
+
+    def move_blocker(self, x, y, dx, dy):
+        """Moves a blocker at (x, y) by (dx, dy) one axis at a time, stopping at obstacles and screen edges."""
+        candidate_rect = self.scratch_rect
+        candidate_rect.update(x + dx, y, BLUE_SIZE, BLUE_SIZE)
+        if candidate_rect.collidelist(self.obstacles) == -1:
+            x += dx
+        candidate_rect.update(x, y + dy, BLUE_SIZE, BLUE_SIZE)
+        if candidate_rect.collidelist(self.obstacles) == -1:
+            y += dy
+        return max(0, min(x, WIDTH - BLUE_SIZE)), max(0, min(y, HEIGHT - BLUE_SIZE))
+
+    def iter_switch_placement(self, placement_sampler, barriers):
+        """
+        Finds a valid location for the orange switch, reachable from the red block past 'barriers'.
+        A generator that yields None while each path check runs and returns the switch rect,
+        for use with 'yield from'.
+        """
+        for _ in range(SWITCH_PLACEMENT_ATTEMPTS):
+            # Using SWITCH_SIZE; assumed same as blue block here
+            position = placement_sampler.sample(BLUE_SIZE, BLUE_SIZE)
+            if position is None:
+                break
+            switch_rect = pygame.Rect(position[0], position[1], BLUE_SIZE, BLUE_SIZE)
+            # Verify a valid path exists from red to switch
+            path_length = yield from iter_bfs_path_length(self.red_rect.center, switch_rect.center, barriers)
+            if path_length is not None:
+                return switch_rect
+        raise RuntimeError("No reachable free space for the switch.")
 
     def update(self, events):
-        current_time = pygame.time.get_ticks()
+        current_time = self.scheduler.now()
+
+        if not self.level_ready:
+            # A reset's level is still being built; this frame's share of the work
+            self.build_level(LEVEL_GENERATION_BUDGET_MS)
+        elif self.game_state == GAME_STATE_INSTRUCTIONS:
+            # Keep looking for a shorter level in a small slice of the frame
+            self.build_level(LEVEL_REFINE_BUDGET_MS)
 
         if self.game_state == GAME_STATE_INSTRUCTIONS:
             for event in events:
@@ -120,25 +311,24 @@ class Game:
                 print("Game state changed to PLAYING via mouse")
             return
 
-        if self.game_state == GAME_STATE_PLAYING:
+        if self.game_state == GAME_STATE_PLAYING and self.level_ready:
             # Update blue block movement
             dx, dy = get_blue_movement(blue_speed=4)  # Blue block speed is set to 4
-            candidate_blue_rect = pygame.Rect(self.blue_x + dx, self.blue_y, BLUE_SIZE, BLUE_SIZE)
-            if not any(candidate_blue_rect.colliderect(obs) for obs in self.obstacles):
-                self.blue_x += dx
-            candidate_blue_rect = pygame.Rect(self.blue_x, self.blue_y + dy, BLUE_SIZE, BLUE_SIZE)
-            if not any(candidate_blue_rect.colliderect(obs) for obs in self.obstacles):
-                self.blue_y += dy
-            self.blue_x = max(0, min(self.blue_x, WIDTH - BLUE_SIZE))
-            self.blue_y = max(0, min(self.blue_y, HEIGHT - BLUE_SIZE))
+            self.blue_x, self.blue_y = self.move_blocker(self.blue_x, self.blue_y, dx, dy)
             self.blue_rect.topleft = (self.blue_x, self.blue_y)
 
+            # The co-op partner's ally block moves with the input they last sent
+            if self.ally_active:
+                self.ally_x, self.ally_y = self.move_blocker(self.ally_x, self.ally_y, *self.ally_input)
+                self.ally_rect.topleft = (self.ally_x, self.ally_y)
+
             # Check if red collides with the switch to disable barriers
             if not self.switch_triggered and self.red_rect.colliderect(self.switch_rect):
                 self.switch_triggered = True
                 self.barriers_disabled = True
+                self.flow_field.set_barriers_enabled(False)
                 self.switch_activation_time = current_time
-                self.next_pink_spawn_time = current_time + 5000  # 5000ms interval
+                self.schedule_switch_events(current_time + PINK_SPAWN_INTERVAL)
                 for _ in range(2):
                     self.spawn_pink_circle()
 
@@ -146,16 +336,11 @@ class Game:
             if self.red_rect.colliderect(self.green_rect):
                 self.game_state = GAME_STATE_WIN
 
-            # Check switch timer for lose condition
-            if self.barriers_disabled and (current_time - self.switch_activation_time > SWITCH_TIMER_DURATION):
-                self.game_state = GAME_STATE_LOSE
-
-            # Spawn new pink circles periodically
-            if self.barriers_disabled and (self.next_pink_spawn_time is None or current_time >= self.next_pink_spawn_time):
-                self.spawn_pink_circle()
-                self.next_pink_spawn_time = current_time + 5000
+            # Run due timers: the switch lose timer and periodic pink spawns
+            self.scheduler.update()
 
             # Update pink hazards movement
+            self.flow_field.set_target(self.red_rect.center)
             self.update_pink_circles()
 
             # Update red block's autonomous movement
@@ -164,12 +349,11 @@ class Game:
             # Handle red and blue block collisions
             if self.red_rect.colliderect(self.blue_rect):
                 self.handle_red_blue_collision()
+            if self.ally_active and self.red_rect.colliderect(self.ally_rect):
+                self.handle_red_blue_collision(self.ally_rect)
 
             # Resolve any residual collisions for red block
-            barriers = self.obstacles.copy()
-            if not self.barriers_disabled:
-                barriers += get_cell_barriers(self.green_rect, pad=10, thick=10)
-            self.red_rect = resolve_red_collision(self.red_rect, barriers)
+            self.red_rect = resolve_red_collision(self.red_rect, self.current_barriers())
             self.red_x, self.red_y = self.red_rect.topleft
 
             # Clamp red block to screen edges and adjust speed accordingly
@@ -187,89 +371,117 @@ class Game:
                 self.red_speed_y = -abs(self.red_speed_y)
             self.red_x, self.red_y = self.red_rect.topleft
 
-        # Update sprite animation
-        if current_time - self.last_frame_update_time > self.frame_duration:
-            self.current_frame_index = (self.current_frame_index + 1) % self.num_frames
-            self.last_frame_update_time = current_time
+            self.save_snapshot()
 
     def spawn_pink_circle(self):
-        """Spawns a pink hazard circle at a random valid location."""
-        while True:
-            pink_x = random.randint(0, WIDTH - PINK_DIAMETER)
-            pink_y = random.randint(0, HEIGHT - PINK_DIAMETER)
-            pink_rect = pygame.Rect(pink_x, pink_y, PINK_DIAMETER, PINK_DIAMETER)
-            conflict = any(pink_rect.colliderect(obs) for obs in self.obstacles)
-            if not conflict:
-                distance = math.hypot(pink_rect.centerx - self.red_rect.centerx,
-                                      pink_rect.centery - self.red_rect.centery)
-                if distance < 150:
-                    conflict = True
-            if not conflict:
-                break
+        """
+        Spawns a pink hazard circle at a random valid location away from the red block.
+        Returns False if there is nowhere left to spawn one.
+        """
+        position = self.pink_sampler.sample(PINK_DIAMETER, PINK_DIAMETER,
+                                            exclude_center=self.red_rect.center,
+                                            exclude_radius=PINK_SPAWN_CLEARANCE)
+        if position is None:
+            return False
         dir_x = random.choice([PINK_SPEED, -PINK_SPEED])
         dir_y = random.choice([PINK_SPEED, -PINK_SPEED])
-        self.pink_circles.append({'rect': pink_rect, 'speed_x': dir_x, 'speed_y': dir_y})
+        homing = random.random() < PINK_HOMING_CHANCE
+        self.add_pink_circle(position[0], position[1], dir_x, dir_y, homing)
+        return True
+
+    def add_pink_circle(self, x, y, speed_x, speed_y, homing):
+        """Adds a pink hazard with its own animation (homing hazards are drawn swimming)."""
+        anim = self.animator.add("swim", self.scheduler.now(), speed=random.uniform(0.8, 1.2),
+                                 phase=random.randrange(1000))
+        self.pink_circles.append(PinkCircle(x, y, speed_x, speed_y, homing, anim))
+
+    def truncate_pink_circles(self, count):
+        """Removes all pink hazards after the first 'count'."""
+        for circle in self.pink_circles[count:]:
+            self.animator.remove(circle.anim)
+        del self.pink_circles[count:]
 
     def update_pink_circles(self):
         """Updates the movement of pink hazard circles and checks for collisions with the red block."""
+        now = self.scheduler.now()
+        red_mask = None
+        barriers = self.current_barriers()
+        temp_rect = self.scratch_rect
         for circle in self.pink_circles:
-            new_x = circle['rect'].x + circle['speed_x']
-            temp_rect = pygame.Rect(new_x, circle['rect'].y, circle['rect'].width, circle['rect'].height)
-            barriers = self.obstacles.copy()
-            if not self.barriers_disabled:
-                barriers += get_cell_barriers(self.green_rect, pad=10, thick=10)
-            if any(temp_rect.colliderect(obs) for obs in barriers):
-                circle['speed_x'] = -circle['speed_x']
+            rect = circle.rect
+            if circle.homing:
+                # Homing hazards follow the flow field towards the red block. Their steered
+                # speeds are fractional, so they move on a sub-pixel position like the red block.
+                steer_x, steer_y = self.flow_field.direction(rect.center)
+                if steer_x or steer_y:
+                    circle.speed_x = steer_x * PINK_SPEED
+                    circle.speed_y = steer_y * PINK_SPEED
+                x, y = circle.x, circle.y
             else:
-                circle['rect'].x = new_x
-            new_y = circle['rect'].y + circle['speed_y']
-            temp_rect = pygame.Rect(circle['rect'].x, new_y, circle['rect'].width, circle['rect'].height)
-            if any(temp_rect.colliderect(obs) for obs in barriers):
-                circle['speed_y'] = -circle['speed_y']
+                x, y = rect.x, rect.y
+            new_x = x + circle.speed_x
+            temp_rect.update(new_x, y, rect.width, rect.height)
+            if temp_rect.collidelist(barriers) != -1:
+                circle.speed_x = -circle.speed_x
             else:
-                circle['rect'].y = new_y
+                x = new_x
+            new_y = y + circle.speed_y
+            temp_rect.update(x, new_y, rect.width, rect.height)
+            if temp_rect.collidelist(barriers) != -1:
+                circle.speed_y = -circle.speed_y
+            else:
+                y = new_y
             # Clamp to screen edges
-            if circle['rect'].left < 0:
-                circle['rect'].left = 0
-                circle['speed_x'] = abs(circle['speed_x'])
-            if circle['rect'].right > WIDTH:
-                circle['rect'].right = WIDTH
-                circle['speed_x'] = -abs(circle['speed_x'])
-            if circle['rect'].top < 0:
-                circle['rect'].top = 0
-                circle['speed_y'] = abs(circle['speed_y'])
-            if circle['rect'].bottom > HEIGHT:
-                circle['rect'].bottom = HEIGHT
-                circle['speed_y'] = -abs(circle['speed_y'])
-            # Check collision with red block
-            if circle_rect_collision(circle['rect'].center, circle['rect'].width // 2, self.red_rect):
-                self.game_state = GAME_STATE_LOSE
+            if x < 0:
+                x = 0
+                circle.speed_x = abs(circle.speed_x)
+            if x + rect.width > WIDTH:
+                x = WIDTH - rect.width
+                circle.speed_x = -abs(circle.speed_x)
+            if y < 0:
+                y = 0
+                circle.speed_y = abs(circle.speed_y)
+            if y + rect.height > HEIGHT:
+                y = HEIGHT - rect.height
+                circle.speed_y = -abs(circle.speed_y)
+            circle.x, circle.y = x, y
+            rect.x, rect.y = x, y
+            # Check collision with red block: rect broadphase, then the precomputed sprite masks
+            if rect.colliderect(self.red_rect):
+                if red_mask is None:
+                    red_mask = self.animator.mask(self.red_anim, now, flipped=self.red_speed_x < 0)
+                if circle.homing:
+                    pink_mask = self.animator.mask(circle.anim, now, flipped=circle.speed_x < 0)
+                else:
+                    pink_mask = self.pink_mask
+                if mask_collision(red_mask, self.red_rect.topleft, pink_mask, rect.topleft):
+                    self.game_state = GAME_STATE_LOSE
 
     def update_red_block(self):
         """Updates the red block's autonomous movement."""
         new_red_x = self.red_x + self.red_speed_x
-        barriers = self.obstacles.copy()
-        if not self.barriers_disabled:
-            barriers += get_cell_barriers(self.green_rect, pad=10, thick=10)
-        temp_rect = pygame.Rect(new_red_x, self.red_y, RED_WIDTH, RED_HEIGHT)
-        if any(temp_rect.colliderect(obs) for obs in barriers):
+        barriers = self.current_barriers()
+        temp_rect = self.scratch_rect
+        temp_rect.update(new_red_x, self.red_y, RED_WIDTH, RED_HEIGHT)
+        if temp_rect.collidelist(barriers) != -1:
             self.red_speed_x = -self.red_speed_x
         else:
             self.red_x = new_red_x
 
         new_red_y = self.red_y + self.red_speed_y
-        temp_rect = pygame.Rect(self.red_x, new_red_y, RED_WIDTH, RED_HEIGHT)
-        if any(temp_rect.colliderect(obs) for obs in barriers):
+        temp_rect.update(self.red_x, new_red_y, RED_WIDTH, RED_HEIGHT)
+        if temp_rect.collidelist(barriers) != -1:
             self.red_speed_y = -self.red_speed_y
         else:
             self.red_y = new_red_y
 
         self.red_rect.topleft = (self.red_x, self.red_y)
 
-    def handle_red_blue_collision(self):
-        """Adjusts red block's position when colliding with the blue block."""
+    def handle_red_blue_collision(self, blocker_rect=None):
+        """Adjusts red block's position when colliding with the blue block (or 'blocker_rect', e.g. the ally block)."""
+        blocker_rect = blocker_rect or self.blue_rect
         red_center = self.red_rect.center
-        blue_center = self.blue_rect.center
+        blue_center = blocker_rect.center
         diff_x = red_center[0] - blue_center[0]
         diff_y = red_center[1] - blue_center[1]
         distance = max(math.hypot(diff_x, diff_y), 1)
@@ -277,13 +489,11 @@ class Game:
         current_speed = math.hypot(self.red_speed_x, self.red_speed_y)
         self.red_speed_x = current_speed * norm_x
         self.red_speed_y = current_speed * norm_y
-        candidate_red_x = self.blue_rect.right if norm_x >= 0 else self.blue_rect.left - RED_WIDTH
-        candidate_red_y = self.blue_rect.bottom if norm_y >= 0 else self.blue_rect.top - RED_HEIGHT
-        candidate_red_rect = pygame.Rect(candidate_red_x, candidate_red_y, RED_WIDTH, RED_HEIGHT)
-        barriers = self.obstacles.copy()
-        if not self.barriers_disabled:
-            barriers += get_cell_barriers(self.green_rect, pad=10, thick=10)
-        if not any(candidate_red_rect.colliderect(obs) for obs in barriers):
+        candidate_red_x = blocker_rect.right if norm_x >= 0 else blocker_rect.left - RED_WIDTH
+        candidate_red_y = blocker_rect.bottom if norm_y >= 0 else blocker_rect.top - RED_HEIGHT
+        candidate_red_rect = self.scratch_rect
+        candidate_red_rect.update(candidate_red_x, candidate_red_y, RED_WIDTH, RED_HEIGHT)
+        if candidate_red_rect.collidelist(self.current_barriers()) == -1:
             self.red_x = candidate_red_x
             self.red_y = candidate_red_y
             self.red_rect.topleft = candidate_red_rect.topleft
@@ -297,15 +507,21 @@ class Game:
                               "Control the blue block using your joystick or arrow keys.\n"
                               "Avoid pink hazards and follow the instructions.\n\n"
                               "Click 'Start Game' or press A to begin.")
+        elif self.game_state == GAME_STATE_PLAYING and not self.level_ready:
+            # The new level is still being built (see build_level)
+            self.screen.fill((0, 0, 0))
         elif self.game_state == GAME_STATE_PLAYING:
             # Calculate remaining timer if switch activated
             timer_value = None
             if self.barriers_disabled and self.switch_activation_time is not None:
-                elapsed = pygame.time.get_ticks() - self.switch_activation_time
+                elapsed = self.scheduler.now() - self.switch_activation_time
                 timer_value = max(0, (SWITCH_TIMER_DURATION - elapsed) // 1000)
-            # Get the current red sprite frame and determine if it should be flipped
-            red_frame = self.sprite_frames[self.current_frame_index]
-            sprite_flip = self.red_speed_x < 0
+            # Get the current red sprite frame, pre-flipped when moving left
+            now = self.scheduler.now()
+            red_frame = self.animator.frame(self.red_anim, now, flipped=self.red_speed_x < 0)
+            pink_frames = [self.animator.frame(circle.anim, now, flipped=circle.speed_x < 0)
+                           if circle.homing else None
+                           for circle in self.pink_circles]
 
             # Call the gameplay drawing function with all parameters
             draw_gameplay(
@@ -321,8 +537,9 @@ class Game:
                 self.pink_circles,
                 timer_value,
                 self.font,
-                sprite_flip=sprite_flip,
-                get_cell_barriers_func=get_cell_barriers
+                pink_frames=pink_frames,
+                get_cell_barriers_func=get_cell_barriers,
+                ally_rect=self.ally_rect if self.ally_active else None
             )
         elif self.game_state == GAME_STATE_WIN or self.game_state == GAME_STATE_LOSE:
             
@@ -335,7 +552,8 @@ class Game:
             # Check for mouse click on "Play again" or "Exit"
             if pygame.mouse.get_pressed()[0]:
                 mouse_pos = pygame.mouse.get_pos()
-                if play_button_rect.collidepoint(mouse_pos):
+                # A co-op client waits for the host to restart; its next snapshot brings the new round
+                if play_button_rect.collidepoint(mouse_pos) and not self.follows_host:
                     self.reset(start_state=GAME_STATE_PLAYING)
                 elif exit_button_rect.collidepoint(mouse_pos):
                     pygame.quit()
@@ -345,7 +563,8 @@ class Game:
             if self.joystick:
                 # Button 0 is typically "A" on many controllers
                 if self.joystick.get_button(0):
-                    self.reset(start_state=GAME_STATE_PLAYING)
+                    if not self.follows_host:
+                        self.reset(start_state=GAME_STATE_PLAYING)
                 # Button 1 is often "B" (this can vary by controller)
                 elif self.joystick.get_button(1):
                     pygame.quit()
@@ -1,8 +1,10 @@
 # level.py
 import random
 import math
+import time
+from collections import deque
 import pygame
-from settings import WIDTH, HEIGHT, LEVEL_CELL_SIZE, MIN_PATH_CELLS
+from settings import WIDTH, HEIGHT, LEVEL_CELL_SIZE, MIN_PATH_CELLS, LEVEL_BFS_CELLS_PER_STEP
 
 
 def get_cell_barriers(g_rect, pad=10, thick=10):
@@ -13,17 +15,12 @@ def get_cell_barriers(g_rect, pad=10, thick=10):
     return [left_barrier, right_barrier, top_barrier, bottom_barrier]
 
 
-def generate_level(red_rect):
+def iter_level_steps(red_rect, max_attempts=30):
     """
-    Generates a level by creating a list of obstacles and a green target rectangle.
-    The obstacles are randomly placed, ensuring they don't overlap with an inflated red_rect
-    and that the green block (50x50) can be placed without conflicts.
-
-    Returns:
-        obstacles (list of pygame.Rect): The list of obstacle rectangles.
-        green_rect (pygame.Rect): The rectangle for the green block.
+    Does the work of generate_level() in small steps so it can be paused and resumed.
+    Yields None after every obstacle or green block placement try, then yields the
+    finished (obstacles, green_rect). Ends without a level if every attempt fails.
     """
-    max_attempts = 30
     # Inflate red_rect to create a clearance area around the red block.
     red_clearance = red_rect.inflate(10, 10)
 
@@ -43,6 +40,7 @@ def generate_level(red_rect):
             new_obs = pygame.Rect(obs_x, obs_y, obs_WIDTH, obs_HEIGHT)
             if not new_obs.colliderect(red_clearance) and not any(new_obs.colliderect(obs) for obs in obstacles):
                 obstacles.append(new_obs)
+            yield None
 
         # Attempt to place the green block (50x50) within safe boundaries.
         green_size = 50
@@ -65,8 +63,25 @@ def generate_level(red_rect):
             if not conflict:
                 green_rect = candidate_green
                 break
+            yield None
         if green_rect:
-            return obstacles, green_rect
+            yield obstacles, green_rect
+            return
+
+
+def generate_level(red_rect):
+    """
+    Generates a level by creating a list of obstacles and a green target rectangle.
+    The obstacles are randomly placed, ensuring they don't overlap with an inflated red_rect
+    and that the green block (50x50) can be placed without conflicts.
+
+    Returns:
+        obstacles (list of pygame.Rect): The list of obstacle rectangles.
+        green_rect (pygame.Rect): The rectangle for the green block.
+    """
+    for result in iter_level_steps(red_rect):
+        if result is not None:
+            return result
     raise RuntimeError("Couldn't generate a valid level.")
 
 
@@ -78,14 +93,28 @@ def bfs_path_length(start, goal, obstacles, cell_size=LEVEL_CELL_SIZE):
     Returns:
         int: The number of steps from start to goal, or None if no path exists.
     """
+    search = iter_bfs_path_length(start, goal, obstacles, cell_size)
+    while True:
+        try:
+            next(search)
+        except StopIteration as finished:
+            return finished.value
+
+
+def iter_bfs_path_length(start, goal, obstacles, cell_size=LEVEL_CELL_SIZE, cells_per_step=LEVEL_BFS_CELLS_PER_STEP):
+    """
+    Does the search of bfs_path_length() in small steps so it can be paused and resumed.
+    A generator that yields None after every 'cells_per_step' expanded cells and returns
+    the path length (or None), for use with 'yield from'.
+    """
     cols = WIDTH // cell_size
     rows = HEIGHT // cell_size
     start_cell = (start[0] // cell_size, start[1] // cell_size)
     goal_cell = (goal[0] // cell_size, goal[1] // cell_size)
-    from collections import deque
     queue = deque()
     queue.append((start_cell, 0))
     visited = {start_cell}
+    expanded = 0
     while queue:
         (c, r), dist = queue.popleft()
         if (c, r) == goal_cell:
@@ -98,9 +127,79 @@ def bfs_path_length(start, goal, obstacles, cell_size=LEVEL_CELL_SIZE):
                 if not any(obs.collidepoint(center_x, center_y) for obs in obstacles):
                     visited.add((nc, nr))
                     queue.append(((nc, nr), dist + 1))
+        expanded += 1
+        if expanded % cells_per_step == 0:
+            yield None
     return None
 
 
+class LevelGenerator:
+    """
+    Anytime search for the level with the shortest path from the red block to the green block.
+
+    Work is done in slices bounded by a wall-clock budget, and the search can be
+    resumed on a later frame exactly where it stopped. The best valid level found
+    so far is always available in 'best'.
+    """
+
+    def __init__(self, red_rect, max_candidates=None):
+        """
+        Parameters:
+            red_rect (pygame.Rect): Start position of the red block.
+            max_candidates (int or None): Stop after this many complete candidates (None = never).
+        """
+        self.red_rect = red_rect.copy()
+        self.max_candidates = max_candidates
+        self.candidates_tried = 0
+        self.best = None  # (obstacles, green_rect, path_length)
+        self._steps = None
+        self._path_check = None  # (obstacles, green_rect, search) of the candidate being measured
+
+    @property
+    def done(self):
+        return self.max_candidates is not None and self.candidates_tried >= self.max_candidates
+
+    def improve(self, budget_ms):
+        """
+        Searches for up to 'budget_ms' milliseconds, yielding (obstacles, green_rect, path_length)
+        every time a better level is found. Both building a candidate and checking its
+        path are done in small steps, so a slice overruns the budget by at most one step.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        while not self.done and time.perf_counter() < deadline:
+            if self._path_check is not None:
+                obstacles, green_rect, search = self._path_check
+                try:
+                    next(search)
+                    continue
+                except StopIteration as finished:
+                    path_length = finished.value
+                self._path_check = None
+                self.candidates_tried += 1
+                if path_length is not None and (self.best is None or path_length < self.best[2]):
+                    self.best = (obstacles, green_rect, path_length)
+                    yield self.best
+                continue
+            if self._steps is None:
+                self._steps = iter_level_steps(self.red_rect)
+            result = next(self._steps, False)
+            if result is None:
+                continue
+            self._steps = None
+            if result is False:
+                continue  # Every layout of this candidate failed; start a new one
+            obstacles, green_rect = result
+            search = iter_bfs_path_length(self.red_rect.center, green_rect.center, obstacles)
+            self._path_check = (obstacles, green_rect, search)
+
+    def step(self, budget_ms):
+        """Runs one time slice. Returns True if 'best' improved during it."""
+        improved = False
+        for _ in self.improve(budget_ms):
+            improved = True
+        return improved
+
+
 def generate_candidate_level(red_rect, candidate_attempts=10):
     """
     Attempts to generate multiple candidate levels and selects the one with the shortest
@@ -1,34 +1,97 @@
 # main.py
-import pygame, sys
-from settings import WIDTH, HEIGHT, FPS
-from assets import load_sprite_frames
-from level import generate_candidate_level
+import pygame, sys, argparse
+from settings import WIDTH, HEIGHT, FPS, NET_RELAY_PORT, PINK_DIAMETER, CAPTURE_DIR
+from animation import load_frame_cache
 from collisions import resolve_red_collision, circle_rect_collision
 from input_handler import get_blue_movement
 from ui import draw_instructions, draw_gameplay, draw_end_screen
 from game_state import Game
+from netcode import NetPeer, SnapshotInterpolator, capture_snapshot, apply_snapshot
+from capture import FrameRecorder
+
+
+def parse_address(text):
+    """Parses 'host[:port]' into a (host, port) tuple, defaulting to the relay port."""
+    host, _, port = text.partition(":")
+    return host or "127.0.0.1", int(port) if port else NET_RELAY_PORT
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Help the red block reunite with the green block.")
+    parser.add_argument("--host", metavar="RELAY", help="host a co-op session through the relay at host[:port]")
+    parser.add_argument("--join", metavar="RELAY", help="join a co-op session through the relay at host[:port]")
+    parser.add_argument("--record", metavar="DIR", help="record every frame to DIR (F12 toggles recording)")
+    parser.add_argument("--record-format", choices=("png", "raw"), default="png",
+                        help="PNG image sequence or a single raw rgb24 stream")
+    args = parser.parse_args()
+
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
 
-    sprite_frames = load_sprite_frames("assets/images/sprite_sheet2.png")
-    game = Game(screen, sprite_frames)
+    # Swimming hazards are scaled to the hazard size once, at load time
+    frame_cache = load_frame_cache(scales={"swim": (PINK_DIAMETER, PINK_DIAMETER)})
+    game = Game(screen, frame_cache)
+
+    # Co-op: the host simulates and streams snapshots. The joining player sends their
+    # movement, which the host applies to the ally block, and renders the snapshots.
+    peer = None
+    interpolator = None
+    if args.host:
+        peer = NetPeer(parse_address(args.host))
+    elif args.join:
+        peer = NetPeer(parse_address(args.join))
+        interpolator = SnapshotInterpolator()
+        game.follows_host = True
+
+    recorder = FrameRecorder(args.record, args.record_format) if args.record else None
+    finishing_recorders = []  # Stopped recorders still writing out queued frames
 
     while True:
         events = pygame.event.get()  # Gather events here
         for event in events:
             if event.type == pygame.QUIT:
+                if peer is not None:
+                    peer.close()
+                if recorder is not None:
+                    finishing_recorders.append(recorder)
+                for stopped in finishing_recorders:
+                    stopped.close()
                 pygame.quit()
                 sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F12:
+                if recorder is None:
+                    recorder = FrameRecorder(args.record or CAPTURE_DIR, args.record_format)
+                else:
+                    # Don't stall the frame on the encoder; it drains its queue in the background
+                    recorder.close(wait=False)
+                    finishing_recorders.append(recorder)
+                    recorder = None
 
-        game.update(events)  # Pass events to your update() method
+        if interpolator is not None:
+            peer.send_input(*get_blue_movement(blue_speed=4))
+            for sender_time, snapshot in peer.poll():
+                interpolator.push(sender_time, snapshot, pygame.time.get_ticks())
+            snapshot = interpolator.sample(pygame.time.get_ticks())
+            if snapshot is not None:
+                apply_snapshot(game, snapshot)
+        else:
+            if peer is not None:
+                peer.poll()
+                ally_input = peer.remote_input()
+                if ally_input is not None:
+                    game.ally_active = True
+                    game.ally_input = ally_input
+            game.update(events)  # Pass events to your update() method
+            if peer is not None:
+                if game.level_ready:  # Nothing to send while a reset's level is being built
+                    peer.send_snapshot(capture_snapshot(game), pygame.time.get_ticks())
         game.render()
         pygame.display.update()
+        if recorder is not None:
+            recorder.capture(screen)
         clock.tick(FPS)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,468 @@
+# netcode.py
+import socket
+import struct
+import time
+from collections import deque
+import pygame
+from settings import (GAME_STATES, SWITCH_TIMER_DURATION, NET_MAX_PACKET_SIZE, NET_VELOCITY_SCALE,
+                      NET_SNAPSHOT_HISTORY, NET_INTERPOLATION_DELAY, NET_KEEPALIVE_INTERVAL,
+                      NET_INPUT_TIMEOUT)
+
+# Message types (first byte of every datagram)
+MSG_JOIN = 1
+MSG_SNAPSHOT = 2
+MSG_ACK = 3
+MSG_INPUT = 4  # Joining player -> host: movement for the ally block
+
+FLAG_BARRIERS_DISABLED = 1
+FLAG_SWITCH_TRIGGERED = 2
+FLAG_ALLY_ACTIVE = 4
+
+# Indices into a snapshot's 'fields' list. Every field is a quantized int16.
+FIELD_GAME_STATE = 0
+FIELD_FLAGS = 1
+FIELD_TIMER = 2  # Remaining switch time in tenths of a second, -1 if not running
+FIELD_RED_X = 3
+FIELD_RED_Y = 4
+FIELD_RED_VX = 5
+FIELD_RED_VY = 6
+FIELD_BLUE_X = 7
+FIELD_BLUE_Y = 8
+FIELD_ALLY_X = 9
+FIELD_ALLY_Y = 10
+NUM_FIELDS = 11
+
+# Each pink hazard is [x, y, vx, vy, flags], quantized like the red block.
+PINK_VALUES = 5
+PINK_FLAG_HOMING = 1
+
+NO_BASELINE = 0xFFFFFFFF
+LEVEL_UNCHANGED = 0xFFFF
+
+_HEADER = struct.Struct("<BIIIH")  # type, seq, baseline seq, sender time (ms), field mask
+_ACK = struct.Struct("<BI")
+_INPUT = struct.Struct("<BIhh")  # type, input seq, dx, dy (fixed point like velocities)
+_INT16 = struct.Struct("<h")
+_UINT16 = struct.Struct("<H")
+_PINK_COUNTS = struct.Struct("<HH")  # pink count, number of pink entries in this packet
+_PINK_ENTRY = struct.Struct("<HB")   # pink index, value mask
+
+
+def empty_snapshot():
+    """Returns the implicit baseline used before any snapshot has been acknowledged."""
+    return {'fields': [0] * NUM_FIELDS, 'level': [], 'pinks': []}
+
+
+def _quantize(value):
+    return max(-32768, min(32767, int(round(value))))
+
+
+def capture_level(game):
+    """
+    Flattens the per-level geometry (green block, switch and obstacles) into a list of ints.
+    It is part of every snapshot but only goes on the wire when it differs from the baseline.
+    """
+    level = list(game.green_rect) + list(game.switch_rect)
+    for obs in game.obstacles:
+        level.extend(obs)
+    return level
+
+
+def capture_snapshot(game):
+    """
+    Captures the networked state of a Game as quantized ints.
+
+    Returns:
+        dict: {'fields': [...], 'level': [...], 'pinks': [[x, y, vx, vy, flags], ...]}
+    """
+    flags = 0
+    if game.barriers_disabled:
+        flags |= FLAG_BARRIERS_DISABLED
+    if game.switch_triggered:
+        flags |= FLAG_SWITCH_TRIGGERED
+    if game.ally_active:
+        flags |= FLAG_ALLY_ACTIVE
+    timer = -1
+    if game.barriers_disabled and game.switch_activation_time is not None:
+        elapsed = game.scheduler.now() - game.switch_activation_time
+        timer = max(0, SWITCH_TIMER_DURATION - elapsed) // 100
+    fields = [
+        GAME_STATES.index(game.game_state),
+        flags,
+        _quantize(timer),
+        _quantize(game.red_rect.x),
+        _quantize(game.red_rect.y),
+        _quantize(game.red_speed_x * NET_VELOCITY_SCALE),
+        _quantize(game.red_speed_y * NET_VELOCITY_SCALE),
+        _quantize(game.blue_rect.x),
+        _quantize(game.blue_rect.y),
+        _quantize(game.ally_rect.x),
+        _quantize(game.ally_rect.y),
+    ]
+    pinks = [[_quantize(circle.rect.x), _quantize(circle.rect.y),
+              _quantize(circle.speed_x * NET_VELOCITY_SCALE),
+              _quantize(circle.speed_y * NET_VELOCITY_SCALE),
+              PINK_FLAG_HOMING if circle.homing else 0]
+             for circle in game.pink_circles]
+    return {'fields': fields, 'level': capture_level(game), 'pinks': pinks}
+
+
+def encode_delta(seq, time_ms, snapshot, baseline_seq, baseline, priorities, max_size=NET_MAX_PACKET_SIZE):
+    """
+    Encodes 'snapshot' as a delta against 'baseline'.
+
+    Only changed fields and changed pink values are written. Pink updates are
+    sent in priority order until 'max_size' is reached; hazards that do not fit
+    keep accumulating priority in 'priorities' and go out in a later packet, so
+    the packet size stays bounded no matter how many hazards are active.
+
+    Parameters:
+        seq (int): Sequence number of this snapshot.
+        time_ms (int): Sender clock time, used by the receiver for interpolation.
+        snapshot (dict): State from capture_snapshot().
+        baseline_seq (int or None): Sequence number of the acknowledged baseline.
+        baseline (dict): The baseline snapshot (empty_snapshot() if baseline_seq is None).
+        priorities (list of int): Per-hazard priority accumulator, updated in place.
+        max_size (int): Byte budget for the datagram.
+
+    Returns:
+        tuple: (bytes, dict) the datagram and the snapshot the receiver will reconstruct from it.
+    """
+    fields, base_fields = snapshot['fields'], baseline['fields']
+    mask = 0
+    changed_values = []
+    for i in range(NUM_FIELDS):
+        if fields[i] != base_fields[i]:
+            mask |= 1 << i
+            changed_values.append(fields[i])
+    data = bytearray(_HEADER.pack(MSG_SNAPSHOT, seq, NO_BASELINE if baseline_seq is None else baseline_seq,
+                                  time_ms & 0xFFFFFFFF, mask))
+    data += struct.pack(f"<{len(changed_values)}h", *changed_values)
+
+    level = snapshot['level']
+    if level == baseline['level']:
+        data += _UINT16.pack(LEVEL_UNCHANGED)
+    else:
+        data += _UINT16.pack(len(level))
+        data += struct.pack(f"<{len(level)}h", *level)
+
+    # Collect changed hazards. New hazards (not in the baseline) go first and in
+    # index order so the receiver's hazard list never has gaps.
+    pinks, base_pinks = snapshot['pinks'], baseline['pinks']
+    del priorities[len(pinks):]
+    priorities.extend([0] * (len(pinks) - len(priorities)))
+    zero_pink = [0] * PINK_VALUES
+    candidates = []
+    for i, pink in enumerate(pinks):
+        is_new = i >= len(base_pinks)
+        base = zero_pink if is_new else base_pinks[i]
+        if pink != base:
+            priorities[i] += 1
+            candidates.append((not is_new, i if is_new else -priorities[i], i))
+    candidates.sort()
+
+    budget = max_size - len(data) - _PINK_COUNTS.size
+    entries = bytearray()
+    num_entries = 0
+    sent_count = min(len(pinks), len(base_pinks))
+    sent_pinks = [list(p) for p in base_pinks[:sent_count]]
+    for is_existing, _, i in candidates:
+        if not is_existing and i != sent_count:
+            continue  # An earlier new hazard did not fit; keep the list contiguous
+        pink = pinks[i]
+        base = base_pinks[i] if is_existing else zero_pink
+        pink_mask = 0
+        values = []
+        for j in range(PINK_VALUES):
+            if pink[j] != base[j]:
+                pink_mask |= 1 << j
+                values.append(pink[j])
+        size = _PINK_ENTRY.size + 2 * len(values)
+        if size > budget:
+            continue
+        budget -= size
+        entries += _PINK_ENTRY.pack(i, pink_mask)
+        entries += struct.pack(f"<{len(values)}h", *values)
+        num_entries += 1
+        priorities[i] = 0
+        if is_existing:
+            sent_pinks[i] = list(pink)
+        else:
+            sent_pinks.append(list(pink))
+            sent_count += 1
+
+    data += _PINK_COUNTS.pack(sent_count, num_entries)
+    data += entries
+    sent = {'fields': list(fields), 'level': level, 'pinks': sent_pinks}
+    return bytes(data), sent
+
+
+def decode_delta(data, baselines):
+    """
+    Decodes a snapshot datagram produced by encode_delta().
+
+    Parameters:
+        data (bytes): The datagram.
+        baselines (dict): Previously decoded snapshots keyed by sequence number.
+
+    Returns:
+        tuple: (seq, time_ms, snapshot), or None if the baseline is no longer available.
+    """
+    _, seq, baseline_seq, time_ms, mask = _HEADER.unpack_from(data, 0)
+    if baseline_seq == NO_BASELINE:
+        baseline = empty_snapshot()
+    else:
+        baseline = baselines.get(baseline_seq)
+        if baseline is None:
+            return None
+    offset = _HEADER.size
+
+    fields = list(baseline['fields'])
+    for i in range(NUM_FIELDS):
+        if mask & (1 << i):
+            fields[i], = _INT16.unpack_from(data, offset)
+            offset += _INT16.size
+
+    level_len, = _UINT16.unpack_from(data, offset)
+    offset += _UINT16.size
+    if level_len == LEVEL_UNCHANGED:
+        level = baseline['level']
+    else:
+        level = list(struct.unpack_from(f"<{level_len}h", data, offset))
+        offset += level_len * _INT16.size
+
+    count, num_entries = _PINK_COUNTS.unpack_from(data, offset)
+    offset += _PINK_COUNTS.size
+    pinks = [list(p) for p in baseline['pinks'][:count]]
+    while len(pinks) < count:
+        pinks.append([0] * PINK_VALUES)
+    for _ in range(num_entries):
+        index, pink_mask = _PINK_ENTRY.unpack_from(data, offset)
+        offset += _PINK_ENTRY.size
+        pink = pinks[index]
+        for j in range(PINK_VALUES):
+            if pink_mask & (1 << j):
+                pink[j], = _INT16.unpack_from(data, offset)
+                offset += _INT16.size
+
+    return seq, time_ms, {'fields': fields, 'level': level, 'pinks': pinks}
+
+
+def lerp_snapshot(older, newer, t):
+    """
+    Interpolates positions between two decoded snapshots (0 <= t <= 1).
+    Discrete state (game state, flags, timer) is taken from the older snapshot.
+    """
+    if older['level'] != newer['level']:
+        return newer  # Level changed in between; nothing sensible to blend
+    fields = list(older['fields'])
+    for i in (FIELD_RED_X, FIELD_RED_Y, FIELD_BLUE_X, FIELD_BLUE_Y, FIELD_ALLY_X, FIELD_ALLY_Y):
+        fields[i] = older['fields'][i] + (newer['fields'][i] - older['fields'][i]) * t
+    fields[FIELD_RED_VX] = newer['fields'][FIELD_RED_VX]
+    fields[FIELD_RED_VY] = newer['fields'][FIELD_RED_VY]
+    pinks = []
+    for i, new_pink in enumerate(newer['pinks']):
+        if i < len(older['pinks']):
+            old_pink = older['pinks'][i]
+            pinks.append([old_pink[0] + (new_pink[0] - old_pink[0]) * t,
+                          old_pink[1] + (new_pink[1] - old_pink[1]) * t,
+                          *new_pink[2:]])
+        else:
+            pinks.append(new_pink)
+    return {'fields': fields, 'level': newer['level'], 'pinks': pinks}
+
+
+def apply_snapshot(game, snapshot):
+    """Writes a (possibly interpolated) snapshot into a Game so it can be rendered."""
+    fields = snapshot['fields']
+    level = snapshot['level']
+    if level and level != capture_level(game):
+        game.green_rect = pygame.Rect(level[0:4])
+        game.switch_rect = pygame.Rect(level[4:8])
+        game.obstacles = [pygame.Rect(level[i:i + 4]) for i in range(8, len(level), 4)]
+        game.build_barrier_lists()
+    # The host's level replaces any the client was still building after a local reset
+    game.level_setup = None
+    game.level_ready = True
+
+    game.game_state = GAME_STATES[fields[FIELD_GAME_STATE]]
+    game.barriers_disabled = bool(fields[FIELD_FLAGS] & FLAG_BARRIERS_DISABLED)
+    game.switch_triggered = bool(fields[FIELD_FLAGS] & FLAG_SWITCH_TRIGGERED)
+    if fields[FIELD_TIMER] < 0:
+        game.switch_activation_time = None
+    else:
+        remaining = fields[FIELD_TIMER] * 100
+        game.switch_activation_time = game.scheduler.now() - (SWITCH_TIMER_DURATION - remaining)
+    game.red_rect.topleft = (fields[FIELD_RED_X], fields[FIELD_RED_Y])
+    game.red_x, game.red_y = game.red_rect.topleft
+    game.red_speed_x = fields[FIELD_RED_VX] / NET_VELOCITY_SCALE
+    game.red_speed_y = fields[FIELD_RED_VY] / NET_VELOCITY_SCALE
+    game.blue_rect.topleft = (fields[FIELD_BLUE_X], fields[FIELD_BLUE_Y])
+    game.blue_x, game.blue_y = game.blue_rect.topleft
+    game.ally_active = bool(fields[FIELD_FLAGS] & FLAG_ALLY_ACTIVE)
+    game.ally_rect.topleft = (fields[FIELD_ALLY_X], fields[FIELD_ALLY_Y])
+    game.ally_x, game.ally_y = game.ally_rect.topleft
+
+    pinks = snapshot['pinks']
+    game.truncate_pink_circles(len(pinks))
+    for i, pink in enumerate(pinks):
+        if i == len(game.pink_circles):
+            game.add_pink_circle(0, 0, 0, 0, False)
+        circle = game.pink_circles[i]
+        circle.x, circle.y = pink[0], pink[1]
+        circle.rect.topleft = (pink[0], pink[1])
+        circle.speed_x = pink[2] / NET_VELOCITY_SCALE
+        circle.speed_y = pink[3] / NET_VELOCITY_SCALE
+        circle.homing = bool(pink[4] & PINK_FLAG_HOMING)  # Homing hazards are drawn swimming
+
+
+class SnapshotInterpolator:
+    """
+    Buffers received snapshots and samples them a fixed delay behind the newest one,
+    so remote movement stays smooth despite jitter and lost packets.
+    """
+
+    def __init__(self, delay=NET_INTERPOLATION_DELAY, capacity=32):
+        self.delay = delay
+        self.buffer = deque(maxlen=capacity)  # (sender time, snapshot), oldest first
+        self.clock_offset = None
+
+    def push(self, sender_time, snapshot, local_time):
+        """Adds a decoded snapshot received at 'local_time'."""
+        # The smallest observed offset is the least delayed packet, our best clock estimate.
+        offset = local_time - sender_time
+        if self.clock_offset is None or offset < self.clock_offset:
+            self.clock_offset = offset
+        if self.buffer and sender_time <= self.buffer[-1][0]:
+            return
+        self.buffer.append((sender_time, snapshot))
+
+    def sample(self, local_time):
+        """Returns the interpolated snapshot for 'local_time', or None if nothing was received yet."""
+        if not self.buffer:
+            return None
+        render_time = local_time - self.clock_offset - self.delay
+        if render_time <= self.buffer[0][0]:
+            return self.buffer[0][1]
+        for (older_time, older), (newer_time, newer) in zip(self.buffer, list(self.buffer)[1:]):
+            if older_time <= render_time < newer_time:
+                return lerp_snapshot(older, newer, (render_time - older_time) / (newer_time - older_time))
+        return self.buffer[-1][1]
+
+
+class NetPeer:
+    """
+    One end of a co-op session, talking to the other player through the relay.
+
+    The host calls send_snapshot() every tick; each snapshot is delta-encoded
+    against the last one the remote side acknowledged. The joining player calls
+    send_input() every tick with their ally block movement, which the host reads
+    from remote_input(). Both sides call poll() to process incoming messages. poll() also repeats the
+    join message as a keepalive, so the relay keeps (or, after a restart,
+    regains) a peer that has nothing else to send yet.
+    """
+
+    def __init__(self, relay_address):
+        self.relay_address = relay_address
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        self.seq = 0
+        self.sent = {}  # seq -> snapshot as the remote will reconstruct it
+        self.acked_seq = None
+        self.priorities = []
+
+        self.received = {}  # seq -> decoded snapshot, used as delta baselines
+        self.latest_received_seq = None
+
+        self.input_seq = 0
+        self.latest_input = None  # (dx, dy) from the remote player
+        self.latest_input_seq = None
+        self.latest_input_time = None
+
+        self.last_join = None
+        self.send_join()
+
+    def send_join(self):
+        """Registers with the relay. Repeated by poll() as a keepalive."""
+        self.last_join = time.monotonic()
+        try:
+            self.sock.sendto(bytes([MSG_JOIN]), self.relay_address)
+        except OSError:
+            pass  # Relay not reachable yet; the next keepalive tries again
+
+    def send_snapshot(self, snapshot, time_ms):
+        """Delta-encodes 'snapshot' against the last acknowledged one and sends it."""
+        baseline_seq = self.acked_seq if self.acked_seq in self.sent else None
+        baseline = self.sent[baseline_seq] if baseline_seq is not None else empty_snapshot()
+        self.seq += 1
+        data, sent = encode_delta(self.seq, time_ms, snapshot, baseline_seq, baseline, self.priorities)
+        self.sent[self.seq] = sent
+        self.sent.pop(self.seq - NET_SNAPSHOT_HISTORY, None)
+        self.sock.sendto(data, self.relay_address)
+
+    def send_input(self, dx, dy):
+        """
+        Sends this player's current movement. Every tick carries the full input
+        state, so a lost packet is simply replaced by the next one.
+        """
+        self.input_seq += 1
+        data = _INPUT.pack(MSG_INPUT, self.input_seq, _quantize(dx * NET_VELOCITY_SCALE),
+                           _quantize(dy * NET_VELOCITY_SCALE))
+        self.sock.sendto(data, self.relay_address)
+
+    def remote_input(self):
+        """
+        Returns the remote player's latest movement as (dx, dy), (0, 0) once it is
+        older than NET_INPUT_TIMEOUT, or None if they never sent any.
+        """
+        if self.latest_input is None:
+            return None
+        if time.monotonic() - self.latest_input_time > NET_INPUT_TIMEOUT:
+            return (0, 0)
+        return self.latest_input
+
+    def poll(self):
+        """
+        Processes all pending datagrams.
+
+        Returns:
+            list: (sender time, snapshot) for every new snapshot received, oldest first.
+        """
+        if time.monotonic() - self.last_join >= NET_KEEPALIVE_INTERVAL:
+            self.send_join()
+        snapshots = []
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except OSError:
+                break  # Nothing left to read (or the relay is unreachable)
+            if not data:
+                continue
+            if data[0] == MSG_ACK:
+                _, seq = _ACK.unpack_from(data, 0)
+                if self.acked_seq is None or seq > self.acked_seq:
+                    self.acked_seq = seq
+            elif data[0] == MSG_INPUT:
+                _, seq, dx, dy = _INPUT.unpack_from(data, 0)
+                if self.latest_input_seq is None or seq > self.latest_input_seq:
+                    self.latest_input_seq = seq
+                    self.latest_input = (dx / NET_VELOCITY_SCALE, dy / NET_VELOCITY_SCALE)
+                    self.latest_input_time = time.monotonic()
+            elif data[0] == MSG_SNAPSHOT:
+                decoded = decode_delta(data, self.received)
+                if decoded is None:
+                    continue
+                seq, time_ms, snapshot = decoded
+                if self.latest_received_seq is not None and seq <= self.latest_received_seq:
+                    continue  # Late or duplicated packet
+                self.latest_received_seq = seq
+                self.received[seq] = snapshot
+                for old_seq in [s for s in self.received if s <= seq - NET_SNAPSHOT_HISTORY]:
+                    del self.received[old_seq]
+                self.sock.sendto(_ACK.pack(MSG_ACK, seq), self.relay_address)
+                snapshots.append((time_ms, snapshot))
+        return snapshots
+
+    def close(self):
+        self.sock.close()
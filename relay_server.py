@@ -0,0 +1,59 @@
+# relay_server.py
+# A minimal UDP relay for local co-op: every datagram a client sends is forwarded
+# to all other clients seen recently. Run with: python relay_server.py [--port 9999]
+# It only listens on localhost unless given --host (e.g. --host 0.0.0.0 for LAN play),
+# since anyone who can reach it can have datagrams forwarded to every registered peer.
+import argparse
+import socket
+import time
+from settings import NET_RELAY_PORT, NET_CLIENT_TIMEOUT
+from netcode import MSG_JOIN
+
+
+def run_relay(host="127.0.0.1", port=NET_RELAY_PORT):
+    """
+    Runs the relay loop forever.
+
+    Parameters:
+        host (str): Interface to bind to.
+        port (int): UDP port to listen on.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    clients = {}  # address -> last time we heard from it
+    print(f"Relay listening on {host}:{port}")
+
+    while True:
+        try:
+            data, address = sock.recvfrom(65535)
+        except ConnectionResetError:
+            continue  # Windows reports ICMP port-unreachable from a departed client here
+        now = time.monotonic()
+        if address not in clients:
+            print("Client joined:", address)
+        clients[address] = now
+        if not data or data[0] == MSG_JOIN:
+            continue
+
+        for other, last_seen in list(clients.items()):
+            if other == address:
+                continue
+            # Peers send a keepalive every NET_KEEPALIVE_INTERVAL, so only a departed one gets here
+            if now - last_seen > NET_CLIENT_TIMEOUT:
+                print("Client timed out:", other)
+                del clients[other]
+                continue
+            sock.sendto(data, other)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP relay for co-op sessions.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to listen on; use 0.0.0.0 to accept peers from the network")
+    parser.add_argument("--port", type=int, default=NET_RELAY_PORT)
+    args = parser.parse_args()
+    run_relay(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# rewind.py
+import math
+from array import array
+from settings import GAME_STATES, STATE_HISTORY_TICKS, STATE_HISTORY_MAX_PINKS
+
+# Layout of one tick's scalar state inside the ring buffer.
+SLOT_GAME_STATE = 0
+SLOT_RED_X = 1
+SLOT_RED_Y = 2
+SLOT_RED_SPEED_X = 3
+SLOT_RED_SPEED_Y = 4
+SLOT_RED_RECT_X = 5
+SLOT_RED_RECT_Y = 6
+SLOT_BLUE_X = 7
+SLOT_BLUE_Y = 8
+SLOT_BARRIERS_DISABLED = 9
+SLOT_SWITCH_TRIGGERED = 10
+SLOT_SWITCH_ACTIVATION = 11  # Relative to the capture time, NaN if unset
+SLOT_NEXT_PINK_SPAWN = 12    # Relative to the capture time, NaN if unset
+SLOT_RED_ANIM_TIME = 13
+SLOT_ALLY_X = 14
+SLOT_ALLY_Y = 15
+SLOT_PINK_COUNT = 16
+SLOT_SIZE = 17
+
+# Each hazard is stored as x, y, speed_x, speed_y, homing.
+PINK_SIZE = 5
+
+
+def _relative(timestamp, now):
+    return math.nan if timestamp is None else timestamp - now
+
+
+def _absolute(offset, now):
+    return None if math.isnan(offset) else int(now + offset)
+
+
+class StateHistory:
+    """
+    A preallocated ring buffer of Game simulation states, one slot per tick.
+
+    save() copies the state into the next slot without allocating, and
+    restore() writes any of the last 'capacity' ticks back into the Game.
+    Timestamps are stored relative to the time of capture, so a restored
+    state resumes with the same time left on its timers.
+    """
+
+    def __init__(self, capacity=STATE_HISTORY_TICKS, max_pinks=STATE_HISTORY_MAX_PINKS):
+        self.capacity = capacity
+        self.max_pinks = max_pinks
+        self.scalars = array('d', bytes(8 * SLOT_SIZE * capacity))
+        self.pinks = array('d', bytes(8 * PINK_SIZE * max_pinks * capacity))
+        self.head = 0   # Slot the next save() writes to
+        self.count = 0  # Number of valid slots
+
+    def clear(self):
+        """Forgets all saved ticks (e.g. after the level changes)."""
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _grow_pinks(self, needed):
+        # Rare path: re-layout every slot for a larger hazard capacity.
+        new_max = max(needed, self.max_pinks * 2)
+        stride, new_stride = PINK_SIZE * self.max_pinks, PINK_SIZE * new_max
+        grown = array('d', bytes(8 * new_stride * self.capacity))
+        for slot in range(self.capacity):
+            grown[slot * new_stride:slot * new_stride + stride] = self.pinks[slot * stride:(slot + 1) * stride]
+        self.pinks = grown
+        self.max_pinks = new_max
+
+    def save(self, game, now):
+        """Copies the simulation state of 'game' into the next slot."""
+        if len(game.pink_circles) > self.max_pinks:
+            self._grow_pinks(len(game.pink_circles))
+        scalars = self.scalars
+        base = self.head * SLOT_SIZE
+        scalars[base + SLOT_GAME_STATE] = GAME_STATES.index(game.game_state)
+        scalars[base + SLOT_RED_X] = game.red_x
+        scalars[base + SLOT_RED_Y] = game.red_y
+        scalars[base + SLOT_RED_SPEED_X] = game.red_speed_x
+        scalars[base + SLOT_RED_SPEED_Y] = game.red_speed_y
+        scalars[base + SLOT_RED_RECT_X] = game.red_rect.x
+        scalars[base + SLOT_RED_RECT_Y] = game.red_rect.y
+        scalars[base + SLOT_BLUE_X] = game.blue_x
+        scalars[base + SLOT_BLUE_Y] = game.blue_y
+        scalars[base + SLOT_ALLY_X] = game.ally_x
+        scalars[base + SLOT_ALLY_Y] = game.ally_y
+        scalars[base + SLOT_BARRIERS_DISABLED] = game.barriers_disabled
+        scalars[base + SLOT_SWITCH_TRIGGERED] = game.switch_triggered
+        scalars[base + SLOT_SWITCH_ACTIVATION] = _relative(game.switch_activation_time, now)
+        next_spawn_time = game.pink_spawn_event.due if game.pink_spawn_event is not None else None
+        scalars[base + SLOT_NEXT_PINK_SPAWN] = _relative(next_spawn_time, now)
+        scalars[base + SLOT_RED_ANIM_TIME] = game.animator.clip_time(game.red_anim, now)
+        scalars[base + SLOT_PINK_COUNT] = len(game.pink_circles)
+
+        pinks = self.pinks
+        offset = self.head * PINK_SIZE * self.max_pinks
+        for circle in game.pink_circles:
+            pinks[offset] = circle.x
+            pinks[offset + 1] = circle.y
+            pinks[offset + 2] = circle.speed_x
+            pinks[offset + 3] = circle.speed_y
+            pinks[offset + 4] = circle.homing
+            offset += PINK_SIZE
+
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def restore(self, game, ticks_ago, now):
+        """
+        Writes a saved state back into 'game'.
+
+        Parameters:
+            game (Game): The game to restore into.
+            ticks_ago (int): 0 for the most recent save, 1 for the one before, and so on.
+            now (int): Current time in milliseconds; saved timers are re-based on it.
+
+        Returns:
+            bool: False if that tick is no longer (or not yet) in the buffer.
+        """
+        if not 0 <= ticks_ago < self.count:
+            return False
+        slot = (self.head - 1 - ticks_ago) % self.capacity
+        scalars = self.scalars
+        base = slot * SLOT_SIZE
+        game.game_state = GAME_STATES[int(scalars[base + SLOT_GAME_STATE])]
+        game.red_x = scalars[base + SLOT_RED_X]
+        game.red_y = scalars[base + SLOT_RED_Y]
+        game.red_speed_x = scalars[base + SLOT_RED_SPEED_X]
+        game.red_speed_y = scalars[base + SLOT_RED_SPEED_Y]
+        game.red_rect.topleft = (int(scalars[base + SLOT_RED_RECT_X]), int(scalars[base + SLOT_RED_RECT_Y]))
+        game.blue_x = scalars[base + SLOT_BLUE_X]
+        game.blue_y = scalars[base + SLOT_BLUE_Y]
+        game.blue_rect.topleft = (game.blue_x, game.blue_y)
+        game.ally_x = scalars[base + SLOT_ALLY_X]
+        game.ally_y = scalars[base + SLOT_ALLY_Y]
+        game.ally_rect.topleft = (game.ally_x, game.ally_y)
+        game.barriers_disabled = bool(scalars[base + SLOT_BARRIERS_DISABLED])
+        game.switch_triggered = bool(scalars[base + SLOT_SWITCH_TRIGGERED])
+        game.switch_activation_time = _absolute(scalars[base + SLOT_SWITCH_ACTIVATION], now)
+        game.schedule_switch_events(_absolute(scalars[base + SLOT_NEXT_PINK_SPAWN], now))
+        game.animator.set_clip_time(game.red_anim, scalars[base + SLOT_RED_ANIM_TIME], now)
+
+        count = int(scalars[base + SLOT_PINK_COUNT])
+        circles = game.pink_circles
+        game.truncate_pink_circles(count)
+        while len(circles) < count:
+            game.add_pink_circle(0, 0, 0, 0, False)
+        pinks = self.pinks
+        offset = slot * PINK_SIZE * self.max_pinks
+        for circle in circles:
+            circle.x = pinks[offset]
+            circle.y = pinks[offset + 1]
+            circle.rect.topleft = (int(circle.x), int(circle.y))
+            circle.speed_x = pinks[offset + 2]
+            circle.speed_y = pinks[offset + 3]
+            circle.homing = bool(pinks[offset + 4])
+            offset += PINK_SIZE
+        return True
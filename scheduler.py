@@ -0,0 +1,166 @@
+# scheduler.py
+import heapq
+import itertools
+import pygame
+
+
+class ManualClock:
+    """
+    A clock that only moves when told to, for headless and fixed-timestep runs.
+    Pass an instance anywhere a clock callable (like pygame.time.get_ticks) is expected.
+    """
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+    def advance(self, ms):
+        self.time += ms
+
+
+class TimerEvent:
+    """A scheduled callback. Keep the instance to cancel it later."""
+
+    def __init__(self, due, callback, args, interval):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.interval = interval  # None for one-shot events
+        self.cancelled = False
+
+    @property
+    def pending(self):
+        """True until the event fires (one-shot) or is cancelled."""
+        return not self.cancelled
+
+
+class Scheduler:
+    """
+    Heap-based timer scheduler for one-shot and repeating events.
+
+    update() only looks at the top of the heap, so a frame costs O(1) when
+    nothing is due and O(k log n) for k due events, regardless of how many
+    are pending. Cancelled events are dropped lazily as they reach the top.
+    Time is read from a pluggable clock and excludes time spent paused.
+    """
+
+    def __init__(self, clock=pygame.time.get_ticks):
+        """
+        Parameters:
+            clock (callable): Returns the current time in milliseconds.
+        """
+        self.clock = clock
+        self.heap = []  # (due, sequence, event)
+        self.sequence = itertools.count()
+        self.cancelled_count = 0
+        self.paused_at = None
+        self.paused_total = 0
+
+    def now(self):
+        """Returns scheduler time: the clock minus all time spent paused."""
+        if self.paused_at is not None:
+            return self.paused_at - self.paused_total
+        return self.clock() - self.paused_total
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = self.clock()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.paused_total += self.clock() - self.paused_at
+            self.paused_at = None
+
+    def __len__(self):
+        return len(self.heap) - self.cancelled_count
+
+    def _push(self, event):
+        heapq.heappush(self.heap, (event.due, next(self.sequence), event))
+
+    def call_at(self, due, callback, *args, interval=None):
+        """Schedules callback(*args) at scheduler time 'due', repeating every 'interval' ms if given."""
+        event = TimerEvent(due, callback, args, interval)
+        self._push(event)
+        return event
+
+    def call_later(self, delay, callback, *args):
+        """Schedules callback(*args) once, 'delay' ms from now."""
+        return self.call_at(self.now() + delay, callback, *args)
+
+    def call_every(self, interval, callback, *args, first_delay=None):
+        """Schedules callback(*args) every 'interval' ms, first after 'first_delay' (default: one interval)."""
+        delay = interval if first_delay is None else first_delay
+        return self.call_at(self.now() + delay, callback, *args, interval=interval)
+
+    def cancel(self, event):
+        """Cancels a pending event. Cancelling an event twice or after it fired is harmless."""
+        if event is None or event.cancelled:
+            return
+        # Events that already fired are flagged as cancelled, so this one is still in the heap.
+        event.cancelled = True
+        self.cancelled_count += 1
+        # Rebuild once cancelled entries dominate, so the heap does not grow without bound.
+        # In place, because a callback can cancel events while update() is walking the heap.
+        if self.cancelled_count > 64 and self.cancelled_count > len(self.heap) // 2:
+            self.heap[:] = [entry for entry in self.heap if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+            self.cancelled_count = 0
+
+    def clear(self):
+        """Drops every pending event."""
+        for _, _, event in self.heap:
+            event.cancelled = True
+        self.heap.clear()
+        self.cancelled_count = 0
+
+    def update(self):
+        """
+        Runs every event that is due. Repeating events are rescheduled; if a
+        repeat was missed entirely (e.g. after a long stall) it is skipped
+        rather than fired in a burst.
+        """
+        if self.paused_at is not None:
+            return
+        now = self.now()
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            _, _, event = heapq.heappop(heap)
+            if event.cancelled:
+                self.cancelled_count -= 1
+                continue
+            if event.interval is not None:
+                event.due += event.interval
+                if event.due <= now:
+                    event.due = now + event.interval
+                self._push(event)
+            else:
+                event.cancelled = True  # Fired; later cancel() calls are no-ops
+            event.callback(*event.args)
+
+
+def check_cancel_during_update():
+    """
+    Regression check: a callback that cancels enough events to compact the heap
+    must not make other events fire twice. Run with: python scheduler.py
+    """
+    clock = ManualClock()
+    scheduler = Scheduler(clock)
+    doomed = [scheduler.call_at(50, lambda: None) for _ in range(100)]
+    fired = []
+    scheduler.call_at(10, lambda: [scheduler.cancel(event) for event in doomed])
+    scheduler.call_at(10, lambda: fired.append(clock()), interval=100)
+    for clock.time in range(0, 400, 10):
+        scheduler.update()
+    assert fired == [10, 110, 210, 310], fired
+    assert len(scheduler) == 1, len(scheduler)
+    print("Scheduler check passed")
+
+
+if __name__ == "__main__":
+    check_cancel_during_update()
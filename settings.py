@@ -26,16 +26,47 @@ GAME_STATE_INSTRUCTIONS = "instructions"
 GAME_STATE_PLAYING = "playing"
 GAME_STATE_WIN = "win"
 GAME_STATE_LOSE = "lose"
+GAME_STATES = [GAME_STATE_INSTRUCTIONS, GAME_STATE_PLAYING, GAME_STATE_WIN, GAME_STATE_LOSE]
 
 # Timer settings (in milliseconds)
 SWITCH_TIMER_DURATION = 60000  # 60 seconds for switch timer
+PINK_SPAWN_INTERVAL = 5000     # A new pink hazard every 5 seconds once the switch is hit
 
 # Obstacle and hazard settings
 PINK_DIAMETER = 40
 PINK_SPEED = 1.7  # Matches red block's speed
+PINK_HOMING_CHANCE = 0.5  # Fraction of pink hazards that chase the red block
+PINK_SPAWN_CLEARANCE = 150  # Minimum distance between a new hazard and the red block
 
 # Level generation parameters
 LEVEL_CELL_SIZE = 40  # Used for grid-based pathfinding
 MIN_PATH_CELLS = 30   # Minimum cells required in path for a valid level
+LEVEL_GENERATION_BUDGET_MS = 20  # Per-frame budget for building a new level after a reset
+LEVEL_SEARCH_BUDGET_MS = 10      # Search time before the best level found so far is set up
+LEVEL_REFINE_BUDGET_MS = 4       # Per-frame budget for improving the level on the instructions screen
+LEVEL_MAX_CANDIDATES = 10        # Candidate levels considered before the search stops
+LEVEL_BFS_CELLS_PER_STEP = 20    # Grid cells a path check expands before it pauses for the frame budget
+LEVEL_STEP_MAX_MS = 1            # Longest single level-building step; slices stop this early to stay in budget
+SPAWN_CELL_SIZE = 10  # Resolution of the free-space map used for spawn placement
+SWITCH_PLACEMENT_ATTEMPTS = 20  # Free positions tried for a switch reachable from the red block
+
+# State history (rollback / rewind)
+STATE_HISTORY_TICKS = 240      # Ticks kept in the ring buffer (4 seconds at 60 FPS)
+STATE_HISTORY_MAX_PINKS = 256  # Hazards per tick preallocated; the buffer grows once if exceeded
+
+# Network settings (co-op snapshots via the local relay)
+NET_RELAY_PORT = 9999
+NET_MAX_PACKET_SIZE = 1200     # Byte budget per snapshot datagram, stays under a typical MTU
+NET_VELOCITY_SCALE = 64        # Velocities are sent as fixed point with this many steps per pixel
+NET_SNAPSHOT_HISTORY = 64      # Snapshots kept on each side as possible delta baselines
+NET_INTERPOLATION_DELAY = 100  # Milliseconds the client renders behind the newest snapshot
+NET_KEEPALIVE_INTERVAL = 2.0   # Seconds between a peer's join messages to the relay
+NET_CLIENT_TIMEOUT = 10.0      # Seconds of silence before the relay forgets a peer
+NET_INPUT_TIMEOUT = 0.5        # Seconds before the host stops applying a silent partner's last input
+
+# Gameplay capture (F12 toggles recording)
+CAPTURE_DIR = "captures"
+CAPTURE_POOL_SIZE = 4         # Frame buffers in flight before frames are dropped
+CAPTURE_PNG_COMPRESSION = 1   # zlib level for PNG frames; low keeps the encoder ahead of the game
 
 # Other settings can be added here as needed...
\ No newline at end of file
@@ -0,0 +1,140 @@
+# spawn.py
+import math
+import random
+from settings import WIDTH, HEIGHT, SPAWN_CELL_SIZE
+
+
+class FreeSpaceSampler:
+    """
+    Picks random spawn positions that do not overlap a fixed set of blockers.
+
+    The blockers are rasterised onto a coarse occupancy grid once, and an
+    integral image (2D prefix sum) over that grid answers "is this footprint
+    free?" in constant time. For each footprint size the list of free
+    positions is built once, after which sampling is a single random choice.
+    """
+
+    def __init__(self, blockers, cell_size=SPAWN_CELL_SIZE, footprints=(), deferred=False):
+        """
+        Parameters:
+            blockers (list of pygame.Rect): Rectangles a spawned object must not overlap.
+            cell_size (int): Grid resolution in pixels; spawn positions are multiples of it.
+            footprints (iterable of tuple): (width, height) sizes to prepare up front.
+            deferred (bool): Leave the grid unbuilt until iter_build() has run to completion.
+        """
+        self.cell_size = cell_size
+        self.cols = WIDTH // cell_size
+        self.rows = HEIGHT // cell_size
+        self.blockers = blockers
+        self.footprints = tuple(footprints)
+        self.integral = None
+        self.free_positions = {}
+        if not deferred:
+            for _ in self.iter_build():
+                pass
+
+    def iter_build(self, rows_per_step=10, blockers_per_step=10):
+        """
+        Builds the occupancy grid, its integral image and the up-front footprint
+        lists, yielding after each batch of blockers and each band of grid rows so
+        the work can be spread over frames.
+        """
+        cell_size = self.cell_size
+        occupied = [0] * (self.cols * self.rows)
+        for count, rect in enumerate(self.blockers, 1):
+            first_c = max(rect.left // cell_size, 0)
+            last_c = min((rect.right - 1) // cell_size, self.cols - 1)
+            first_r = max(rect.top // cell_size, 0)
+            last_r = min((rect.bottom - 1) // cell_size, self.rows - 1)
+            for r in range(first_r, last_r + 1):
+                for c in range(first_c, last_c + 1):
+                    occupied[r * self.cols + c] = 1
+            if count % blockers_per_step == 0:
+                yield
+
+        # integral[(r + 1) * stride + (c + 1)] = occupied cells in rows 0..r, columns 0..c
+        stride = self.cols + 1
+        integral = [0] * (stride * (self.rows + 1))
+        for r in range(self.rows):
+            row_sum = 0
+            for c in range(self.cols):
+                row_sum += occupied[r * self.cols + c]
+                integral[(r + 1) * stride + c + 1] = integral[r * stride + c + 1] + row_sum
+            if (r + 1) % rows_per_step == 0:
+                yield
+        self.integral = integral
+
+        for width, height in self.footprints:
+            yield from self.iter_positions(width, height)
+
+    def occupied_cells(self, c, r, cols, rows):
+        """Returns the number of occupied cells in the window starting at cell (c, r)."""
+        stride = self.cols + 1
+        integral = self.integral
+        return (integral[(r + rows) * stride + c + cols] - integral[r * stride + c + cols]
+                - integral[(r + rows) * stride + c] + integral[r * stride + c])
+
+    def positions(self, width, height):
+        """
+        Returns every free top-left position for a width x height footprint.
+        The list is computed on first use and cached.
+        """
+        for _ in self.iter_positions(width, height):
+            pass
+        return self.free_positions[(width, height)]
+
+    def iter_positions(self, width, height, rows_per_step=10):
+        """
+        Computes the same cached list as positions() a band of grid rows at a
+        time, yielding after each band, so the work can be spread over frames.
+        """
+        key = (width, height)
+        if key in self.free_positions:
+            return
+        cell_size = self.cell_size
+        cols = math.ceil(width / cell_size)
+        rows = math.ceil(height / cell_size)
+        found = []
+        last_row = self.rows - rows
+        for band_start in range(0, last_row + 1, rows_per_step):
+            found.extend(
+                (c * cell_size, r * cell_size)
+                for r in range(band_start, min(band_start + rows_per_step, last_row + 1))
+                for c in range(self.cols - cols + 1)
+                if self.occupied_cells(c, r, cols, rows) == 0
+            )
+            yield
+        self.free_positions[key] = found
+
+    def sample(self, width, height, exclude_center=None, exclude_radius=0, max_tries=16):
+        """
+        Returns a uniformly random free top-left position for a width x height footprint.
+
+        Parameters:
+            width (int), height (int): Footprint size in pixels.
+            exclude_center (tuple or None): Centre of a circular keep-out zone.
+            exclude_radius (float): The footprint's centre must be at least this far from exclude_center.
+            max_tries (int): Random draws to try against the keep-out zone before scanning.
+
+        Returns:
+            tuple: (x, y), or None if no valid position exists.
+        """
+        candidates = self.positions(width, height)
+        if not candidates:
+            return None
+        if exclude_center is None:
+            return random.choice(candidates)
+
+        half_w, half_h = width / 2, height / 2
+        ex, ey = exclude_center
+
+        def outside(position):
+            return math.hypot(position[0] + half_w - ex, position[1] + half_h - ey) >= exclude_radius
+
+        for _ in range(max_tries):
+            position = random.choice(candidates)
+            if outside(position):
+                return position
+        # The keep-out zone covers most of the free space; fall back to an exact scan.
+        remaining = [position for position in candidates if outside(position)]
+        return random.choice(remaining) if remaining else None
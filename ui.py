@@ -2,6 +2,67 @@
 import pygame
 from settings import WIDTH, HEIGHT
 
+# Pre-rendered solid sprites, keyed by (shape, color, size)
+_sprite_cache = {}
+
+
+def get_rect_sprite(color, size):
+    """Returns a cached surface of the given size filled with 'color'."""
+    key = ("rect", color, size)
+    sprite = _sprite_cache.get(key)
+    if sprite is None:
+        sprite = pygame.Surface(size)
+        sprite.fill(color)
+        _sprite_cache[key] = sprite
+    return sprite
+
+
+def get_circle_sprite(color, diameter):
+    """Returns a cached transparent surface with a filled circle of the given diameter."""
+    key = ("circle", color, diameter)
+    sprite = _sprite_cache.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (diameter // 2, diameter // 2), diameter // 2)
+        _sprite_cache[key] = sprite
+    return sprite
+
+
+class SpriteBatch:
+    """
+    Collects a frame's blits and submits them in a single Surface.blits (or fblits) call.
+
+    Draws are grouped by layer and drawn in the order the layers were given;
+    within a layer they keep the order they were added in. The per-layer lists
+    are reused between frames.
+    """
+
+    def __init__(self, layers):
+        self.layer_names = list(layers)
+        self.layers = {name: [] for name in self.layer_names}
+        self.sequence = []
+
+    def add(self, layer, sprite, position):
+        self.layers[layer].append((sprite, position))
+
+    def flush(self, surface):
+        """Draws everything queued onto 'surface' and empties the batch."""
+        sequence = self.sequence
+        for name in self.layer_names:
+            draws = self.layers[name]
+            sequence.extend(draws)
+            draws.clear()
+        fblits = getattr(surface, "fblits", None)  # pygame-ce fast path
+        if fblits is not None:
+            fblits(sequence)
+        else:
+            surface.blits(sequence, doreturn=False)
+        sequence.clear()
+
+
+# Layers in back-to-front order, matching the original draw order of draw_gameplay
+_gameplay_batch = SpriteBatch(("level", "actors", "hud", "hazards"))
+
 
 def draw_multiline_text(surface, text, font, color, rect, line_spacing=5):
     """
@@ -185,8 +246,8 @@ def draw_end_screen(surface, font, game_state):
 
 
 def draw_gameplay(surface, obstacles, green_rect, barriers_disabled, switch_rect, switch_triggered,
-                  blue_rect, red_rect, red_frame, pink_circles, timer_value, font, sprite_flip=False,
-                  get_cell_barriers_func=None):
+                  blue_rect, red_rect, red_frame, pink_circles, timer_value, font, pink_frames=None,
+                  get_cell_barriers_func=None, ally_rect=None):
     """
     Renders the gameplay screen with all game elements.
 
@@ -199,38 +260,45 @@ def draw_gameplay(surface, obstacles, green_rect, barriers_disabled, switch_rect
         switch_triggered (bool): Whether the switch has been triggered.
         blue_rect (pygame.Rect): The blue block's rectangle.
         red_rect (pygame.Rect): The red block's rectangle.
-        red_frame (pygame.Surface): Current sprite frame for the red block.
-        pink_circles (list): List of dicts for pink hazards.
+        red_frame (pygame.Surface): Current sprite frame for the red block, already flipped if needed.
+        pink_circles (list of PinkCircle): Pink hazards.
         timer_value (int or None): Remaining time value to display.
         font (pygame.font.Font): Font for drawing timer text.
-        sprite_flip (bool): Whether to flip the red sprite horizontally.
+        pink_frames (list or None): Sprite frame per pink hazard, or None to draw it as a circle.
         get_cell_barriers_func (callable): Function to get cell barriers (if needed).
+        ally_rect (pygame.Rect or None): The co-op partner's block, if one is playing.
     """
     surface.fill((0, 0, 0))
+    # Everything below is queued as pre-rendered sprites and drawn in one batch
+    batch = _gameplay_batch
     # Draw obstacles
     for obs in obstacles:
-        pygame.draw.rect(surface, (128, 128, 128), obs)
+        batch.add("level", get_rect_sprite((128, 128, 128), obs.size), obs.topleft)
     # Draw green block
-    pygame.draw.rect(surface, (0, 255, 0), green_rect)
+    batch.add("level", get_rect_sprite((0, 255, 0), green_rect.size), green_rect.topleft)
     # Draw barriers if applicable
     if not barriers_disabled and get_cell_barriers_func is not None:
         barriers = get_cell_barriers_func(green_rect, pad=10, thick=10)
         for barrier in barriers:
-            pygame.draw.rect(surface, (128, 128, 128), barrier)
+            batch.add("level", get_rect_sprite((128, 128, 128), barrier.size), barrier.topleft)
     # Draw switch if not triggered
     if not switch_triggered:
-        pygame.draw.rect(surface, (255, 165, 0), switch_rect)
+        batch.add("actors", get_rect_sprite((255, 165, 0), switch_rect.size), switch_rect.topleft)
     # Draw blue block
-    pygame.draw.rect(surface, (0, 0, 255), blue_rect)
-    # Draw red block: flip sprite if needed, then blit at red_rect position
-    frame = red_frame
-    if sprite_flip:
-        frame = pygame.transform.flip(red_frame, True, False)
-    surface.blit(frame, red_rect)
+    batch.add("actors", get_rect_sprite((0, 0, 255), blue_rect.size), blue_rect.topleft)
+    # Draw the co-op ally block
+    if ally_rect is not None:
+        batch.add("actors", get_rect_sprite((160, 32, 240), ally_rect.size), ally_rect.topleft)
+    # Draw red block at red_rect position
+    batch.add("actors", red_frame, red_rect.topleft)
     # Draw timer if available
     if timer_value is not None:
         timer_text = font.render(f"{timer_value}", True, (255, 255, 255))
-        surface.blit(timer_text, (WIDTH - 100, 50))
+        batch.add("hud", timer_text, (WIDTH - 100, 50))
     # Draw pink circles (hazards)
-    for circle in pink_circles:
-        pygame.draw.circle(surface, (255, 105, 180), circle['rect'].center, circle['rect'].width // 2)
\ No newline at end of file
+    for i, circle in enumerate(pink_circles):
+        if pink_frames is not None and pink_frames[i] is not None:
+            batch.add("hazards", pink_frames[i], circle.rect.topleft)
+        else:
+            batch.add("hazards", get_circle_sprite((255, 105, 180), circle.rect.width), circle.rect.topleft)
+    batch.flush(surface)
\ No newline at end of file